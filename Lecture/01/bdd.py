@@ -0,0 +1,231 @@
+"""
+Reduced ordered binary decision diagrams for logical sentences.
+
+A knowledge base is compiled into a BDD once; after that, checking whether
+it entails a query is a walk over the two diagrams, adding a fact is one
+conjunction, and the number of models is read off the diagram directly.
+"""
+
+from logic import *
+
+FALSE = 0
+TRUE = 1
+
+
+class BDD():
+    """
+    Shared store of BDD nodes. Node ids index the var, low and high lists;
+    ids 0 and 1 are the FALSE and TRUE terminals. A unique table makes
+    every (var, low, high) node exist once, and a computed table caches
+    the result of every operation on a pair of nodes.
+
+    Variables are numbered in the order they are first added: smaller
+    numbers are tested nearer the root.
+    """
+
+    def __init__(self, order=()):
+        self.names = []
+        self.index = dict()
+        self.var = [None, None]
+        self.low = [None, None]
+        self.high = [None, None]
+        self.unique = dict()
+        self.computed = dict()
+        for name in order:
+            self.variable(name)
+
+    def variable(self, name):
+        """Returns the number of variable name, adding it last if new."""
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+        return self.index[name]
+
+    def level(self, u):
+        """Returns the variable number tested at node u."""
+        return len(self.names) if u <= TRUE else self.var[u]
+
+    def node(self, var, low, high):
+        """Returns the node testing var with the given children."""
+        if low == high:
+            return low
+        key = (var, low, high)
+        u = self.unique.get(key)
+        if u is None:
+            u = len(self.var)
+            self.var.append(var)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = u
+        return u
+
+    def negate(self, u):
+        if u <= TRUE:
+            return 1 - u
+        key = ("not", u)
+        if key not in self.computed:
+            self.computed[key] = self.node(self.var[u], self.negate(self.low[u]),
+                                           self.negate(self.high[u]))
+        return self.computed[key]
+
+    def apply(self, op, u, v):
+        """Returns the node for u op v, where op is "and", "or" or "xor"."""
+        if op == "and":
+            if u == FALSE or v == FALSE:
+                return FALSE
+            if u == TRUE or u == v:
+                return v
+            if v == TRUE:
+                return u
+        elif op == "or":
+            if u == TRUE or v == TRUE:
+                return TRUE
+            if u == FALSE or u == v:
+                return v
+            if v == FALSE:
+                return u
+        else:
+            if u == v:
+                return FALSE
+            if u == FALSE:
+                return v
+            if v == FALSE:
+                return u
+            if u == TRUE:
+                return self.negate(v)
+            if v == TRUE:
+                return self.negate(u)
+
+        # All three operations are commutative
+        if u > v:
+            u, v = v, u
+        key = (op, u, v)
+        if key not in self.computed:
+            var = min(self.level(u), self.level(v))
+            u_low, u_high = self.cofactors(u, var)
+            v_low, v_high = self.cofactors(v, var)
+            self.computed[key] = self.node(var, self.apply(op, u_low, v_low),
+                                           self.apply(op, u_high, v_high))
+        return self.computed[key]
+
+    def cofactors(self, u, var):
+        """Returns the (false, true) children of u with respect to var."""
+        if self.level(u) == var:
+            return self.low[u], self.high[u]
+        return u, u
+
+    def compile(self, sentence):
+        """Returns the node for a logical sentence."""
+        if isinstance(sentence, Symbol):
+            return self.node(self.variable(sentence.name), FALSE, TRUE)
+        if isinstance(sentence, Not):
+            return self.negate(self.compile(sentence.operand))
+        if isinstance(sentence, And):
+            u = TRUE
+            for conjunct in sentence.conjuncts:
+                u = self.apply("and", u, self.compile(conjunct))
+            return u
+        if isinstance(sentence, Or):
+            u = FALSE
+            for disjunct in sentence.disjuncts:
+                u = self.apply("or", u, self.compile(disjunct))
+            return u
+        if isinstance(sentence, Implication):
+            return self.apply("or", self.negate(self.compile(sentence.antecedent)),
+                              self.compile(sentence.consequent))
+        if isinstance(sentence, Biconditional):
+            return self.negate(self.apply("xor", self.compile(sentence.left),
+                                          self.compile(sentence.right)))
+        raise TypeError("must be a logical sentence")
+
+    def implies(self, u, v):
+        """Checks if every assignment satisfying u satisfies v."""
+        if u == FALSE or v == TRUE or u == v:
+            return True
+        if u == TRUE and v == FALSE:
+            return False
+        key = ("implies", u, v)
+        if key not in self.computed:
+            var = min(self.level(u), self.level(v))
+            u_low, u_high = self.cofactors(u, var)
+            v_low, v_high = self.cofactors(v, var)
+            self.computed[key] = (self.implies(u_low, v_low)
+                                  and self.implies(u_high, v_high))
+        return self.computed[key]
+
+    def count(self, u, variables=None):
+        """
+        Returns the number of assignments to the first `variables`
+        variables (all of them by default) that satisfy u.
+        """
+        n = len(self.names) if variables is None else variables
+        counts = {FALSE: 0, TRUE: 1}
+
+        def below(u):
+            """Counts satisfying assignments of the variables from u's level on."""
+            if u not in counts:
+                var = self.var[u]
+                counts[u] = (below(self.low[u]) * 2 ** (self.level(self.low[u]) - var - 1)
+                             + below(self.high[u]) * 2 ** (self.level(self.high[u]) - var - 1))
+            return counts[u]
+
+        total = below(u) * 2 ** self.level(u)
+        return total // 2 ** (len(self.names) - n)
+
+
+def symbol_order(sentence, order=None):
+    """
+    Returns the symbol names of sentence in the order a depth-first walk
+    first meets them, which keeps symbols used together close in the BDD.
+    """
+    order = dict() if order is None else order
+    if isinstance(sentence, Symbol):
+        order.setdefault(sentence.name, len(order))
+    elif isinstance(sentence, Not):
+        symbol_order(sentence.operand, order)
+    elif isinstance(sentence, And):
+        for conjunct in sentence.conjuncts:
+            symbol_order(conjunct, order)
+    elif isinstance(sentence, Or):
+        for disjunct in sentence.disjuncts:
+            symbol_order(disjunct, order)
+    elif isinstance(sentence, Implication):
+        symbol_order(sentence.antecedent, order)
+        symbol_order(sentence.consequent, order)
+    elif isinstance(sentence, Biconditional):
+        symbol_order(sentence.left, order)
+        symbol_order(sentence.right, order)
+    return list(order)
+
+
+class CompiledKnowledge():
+    """
+    A knowledge base compiled into a BDD, which can take new facts
+    and answer queries without being compiled again.
+    """
+
+    def __init__(self, knowledge=None):
+        self.bdd = BDD(symbol_order(knowledge) if knowledge is not None else ())
+        self.root = TRUE
+        if knowledge is not None:
+            self.add(knowledge)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        self.root = self.bdd.apply("and", self.root, self.bdd.compile(sentence))
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        return self.bdd.implies(self.root, self.bdd.compile(query))
+
+    def count_models(self):
+        """Returns the number of models over every symbol seen so far."""
+        return self.bdd.count(self.root)
+
+
+def bdd_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, like model_check,
+    by compiling both into a BDD.
+    """
+    return CompiledKnowledge(knowledge).entails(query)
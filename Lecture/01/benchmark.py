@@ -0,0 +1,237 @@
+"""
+Benchmark for the entailment engines.
+
+Asks every engine whether each knowledge base entails each of its symbols,
+over the knowledge bases of harry.py, clue.py, puzzle.py, mastermind.py and
+the four knights puzzles, and over synthetic N people x N houses puzzles.
+Reports the time, the work done and the peak memory of each engine per
+knowledge base, and exits with status 1 if two engines give a different
+answer for the same query.
+
+Work is models enumerated for model_check, model_check_many, pruning_check
+and truth_table_check, resolvents for resolution_check, and diagram nodes
+for bdd_check. Peak memory is measured with tracemalloc in a second run,
+so it does not slow down the timed one, and does not include the worker
+processes of parallel_model_check.
+
+Usage: python benchmark.py [--sizes N ...] [--max-symbols N] [--seed SEED]
+                           [--no-memory] [ENGINE ...]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import runpy
+import sys
+import time
+import tracemalloc
+
+from bdd import CompiledKnowledge
+from logic import *
+from resolution import Prover, clauses
+from truth_table import truth_table_check
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+KNIGHTS = os.path.join(HERE, "..", "..", "PSETs", "PSET1", "knights", "puzzle.py")
+
+
+def run_model_check(knowledge, queries):
+    answers, work = dict(), 0
+    for query in queries:
+        stats = dict()
+        answers[query] = model_check(knowledge, query, stats)
+        work += stats["models"]
+    return answers, work
+
+
+def run_model_check_many(knowledge, queries):
+    stats = dict()
+    answers = model_check_many(knowledge, queries, stats)
+    return {query: answers[query] == YES for query in queries}, stats["models"]
+
+
+def run_pruning_check(knowledge, queries):
+    answers, work = dict(), 0
+    for query in queries:
+        stats = dict()
+        answers[query] = pruning_check(knowledge, query, stats)
+        work += stats["models"]
+    return answers, work
+
+
+def run_parallel_model_check(knowledge, queries):
+    return {query: parallel_model_check(knowledge, query) for query in queries}, None
+
+
+def run_truth_table_check(knowledge, queries):
+    answers, work = dict(), 0
+    for query in queries:
+        answers[query] = truth_table_check(knowledge, query)
+        work += 2 ** len(set.union(knowledge.symbols(), query.symbols()))
+    return answers, work
+
+
+def run_sat_check(knowledge, queries):
+    return {query: sat_check(knowledge, query) for query in queries}, None
+
+
+def run_resolution_check(knowledge, queries):
+    answers, work = dict(), 0
+    for query in queries:
+        prover = Prover(clauses(knowledge, query))
+        answers[query] = prover.refute()
+        work += prover.resolvents
+    return answers, work
+
+
+def run_bdd_check(knowledge, queries):
+    answers, work = dict(), 0
+    for query in queries:
+        compiled = CompiledKnowledge(knowledge)
+        answers[query] = compiled.entails(query)
+        work += len(compiled.bdd.var) - 2
+    return answers, work
+
+
+# Engines by name: function(knowledge, queries) -> ({query: entailed}, work
+# or None), and whether the engine enumerates all 2^n models, so that it is
+# skipped on knowledge bases with more than --max-symbols symbols
+ENGINES = {
+    "model_check": (run_model_check, True),
+    "model_check_many": (run_model_check_many, True),
+    "parallel_model_check": (run_parallel_model_check, True),
+    "pruning_check": (run_pruning_check, False),
+    "truth_table_check": (run_truth_table_check, True),
+    "sat_check": (run_sat_check, False),
+    "resolution_check": (run_resolution_check, False),
+    "bdd_check": (run_bdd_check, False),
+}
+
+
+def script_knowledge(path, names):
+    """
+    Returns the sentences with the given global names after running the
+    script at path, without its output.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        namespace = runpy.run_path(path)
+    return [namespace[name] for name in names]
+
+
+def houses_puzzle(n, rng):
+    """
+    Returns a knowledge base like puzzle.py's for n people and n houses,
+    with clues drawn from a random assignment so that it has a model.
+    """
+    people = [f"Person{i}" for i in range(n)]
+    houses = [f"House{i}" for i in range(n)]
+    assignment = dict(zip(people, rng.sample(houses, n)))
+
+    knowledge = KnowledgeBuilder()
+    for person in people:
+        knowledge.add(Or(*[Symbol(f"{person}{house}") for house in houses]))
+        for h1 in houses:
+            for h2 in houses:
+                if h1 != h2:
+                    knowledge.add(Implication(
+                        Symbol(f"{person}{h1}"), Not(Symbol(f"{person}{h2}"))
+                    ))
+    for house in houses:
+        for p1 in people:
+            for p2 in people:
+                if p1 != p2:
+                    knowledge.add(Implication(
+                        Symbol(f"{p1}{house}"), Not(Symbol(f"{p2}{house}"))
+                    ))
+
+    # One clue per person: either of two houses, or not some other house
+    for person in people:
+        house = assignment[person]
+        other = rng.choice([h for h in houses if h != house])
+        if rng.random() < 0.5:
+            knowledge.add(Or(Symbol(f"{person}{house}"), Symbol(f"{person}{other}")))
+        else:
+            knowledge.add(Not(Symbol(f"{person}{other}")))
+    return knowledge.build()
+
+
+def knowledge_bases(sizes, rng):
+    """Returns a list of (name, knowledge) pairs to benchmark."""
+    bases = []
+    for script in ("harry.py", "clue.py", "puzzle.py", "mastermind.py"):
+        knowledge, = script_knowledge(os.path.join(HERE, script), ["knowledge"])
+        bases.append((script, knowledge))
+    names = [f"knowledge{i}" for i in range(4)]
+    for name, knowledge in zip(names, script_knowledge(KNIGHTS, names)):
+        bases.append((f"knights {name}", knowledge))
+    for n in sizes:
+        bases.append((f"houses {n}x{n}", houses_puzzle(n, rng)))
+    return bases
+
+
+def measure(engine, knowledge, queries, memory):
+    """
+    Returns answers, work, seconds and peak bytes (or None) of one engine.
+    """
+    function = ENGINES[engine][0]
+    start = time.perf_counter()
+    answers, work = function(knowledge, queries)
+    elapsed = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        function(knowledge, queries)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return answers, work, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="entailment engine benchmark")
+    parser.add_argument("engines", nargs="*", default=list(ENGINES), metavar="ENGINE",
+                        help=f"any of {', '.join(ENGINES)}")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[3, 4, 5, 6])
+    parser.add_argument("--max-symbols", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true")
+    args = parser.parse_args()
+    for engine in args.engines:
+        if engine not in ENGINES:
+            parser.error(f"unknown engine {engine}")
+    rng = random.Random(args.seed)
+
+    failed = False
+    for name, knowledge in knowledge_bases(args.sizes, rng):
+        queries = [Symbol(symbol) for symbol in sorted(knowledge.symbols())]
+        n = len(queries)
+        print(f"{name}: {n} symbols")
+
+        expected = None
+        for engine in args.engines:
+            if ENGINES[engine][1] and n > args.max_symbols:
+                print(f"    {engine:22} skipped, more than {args.max_symbols} symbols")
+                continue
+            answers, work, elapsed, peak = measure(engine, knowledge, queries,
+                                                   not args.no_memory)
+            work = "-" if work is None else f"{work:,}"
+            peak = "-" if peak is None else f"{peak / 1024:,.0f} KiB"
+            print(f"    {engine:22} {elapsed * 1000:10.2f} ms  work {work:>14}  peak {peak:>12}")
+
+            if expected is None:
+                expected = (engine, answers)
+            disagree = [query for query in queries if answers[query] != expected[1][query]]
+            for query in disagree:
+                print(f"    {engine} and {expected[0]} disagree on {query}")
+                failed = True
+
+        entailed = [query for query in queries if expected and expected[1][query]]
+        print(f"    entailed: {', '.join(str(query) for query in entailed) or 'nothing'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import termcolor
 
+from counting import probability
 from logic import *
 
 mustard = Symbol("ColMustard")
@@ -21,11 +22,12 @@ symbols = characters + rooms + weapons
 
 
 def check_knowledge(knowledge):
+    answers = model_check_many(knowledge, symbols)
     for symbol in symbols:
-        if model_check(knowledge, symbol):
+        if answers[symbol] == YES:
             termcolor.cprint(f"{symbol}: YES", "green")
-        elif not model_check(knowledge, Not(symbol)):
-            print(f"{symbol}: MAYBE")
+        elif answers[symbol] == MAYBE:
+            print(f"{symbol}: MAYBE ({probability(symbol, knowledge):.0%})")
 
 
 # There must be a person, room, and weapon.
@@ -0,0 +1,153 @@
+"""
+Exact model counting (#SAT) for logical sentences.
+
+Sentences are turned into clauses with logic.CNF, whose Tseitin variables
+are each fixed by the symbols, so the clauses have exactly as many models
+as the sentence. Models are counted DPLL-style: propagate unit clauses,
+split the remaining clauses into components that share no variables and
+multiply their counts, branch on the most frequent variable, and cache
+the count of every component seen.
+"""
+
+from logic import *
+
+
+class ModelCounter():
+    """
+    Counts models of clause sets, keeping a cache of component counts
+    that can be shared by several counts over the same variables.
+    """
+
+    def __init__(self):
+        self.cache = dict()
+
+    def count(self, clauses):
+        """
+        Returns the number of assignments to the variables appearing
+        in clauses (a frozenset of frozensets) that satisfy them all.
+        """
+        if not clauses:
+            return 1
+        if frozenset() in clauses:
+            return 0
+        if clauses in self.cache:
+            return self.cache[clauses]
+
+        total = 1
+        for component in components(clauses):
+            if component in self.cache:
+                total *= self.cache[component]
+            else:
+                self.cache[component] = self.branch(component)
+                total *= self.cache[component]
+            if total == 0:
+                break
+        self.cache[clauses] = total
+        return total
+
+    def branch(self, clauses):
+        """Counts the models of connected clauses by splitting on a variable."""
+        counts = dict()
+        for clause in clauses:
+            for lit in clause:
+                counts[abs(lit)] = counts.get(abs(lit), 0) + 1
+        var = max(counts, key=lambda v: (counts[v], -v))
+
+        total = 0
+        for lit in (var, -var):
+            propagated = propagate(clauses, lit)
+            if propagated is None:
+                continue
+            reduced, assigned = propagated
+
+            # Variables that are neither assigned nor left in any clause
+            # can take either value
+            free = len(counts) - len(assigned) - len(variables(reduced))
+            total += self.count(reduced) * 2 ** free
+        return total
+
+
+def variables(clauses):
+    return {abs(lit) for clause in clauses for lit in clause}
+
+
+def propagate(clauses, lit):
+    """
+    Returns (clauses, assigned literals) after asserting lit and then every
+    unit clause that appears, or None if that makes a clause false.
+    """
+    assigned = set()
+    pending = [lit]
+    while pending:
+        lit = pending.pop()
+        if -lit in assigned:
+            return None
+        if lit in assigned:
+            continue
+        assigned.add(lit)
+        simplified = set()
+        for clause in clauses:
+            if lit in clause:
+                continue
+            if -lit in clause:
+                clause = clause - {-lit}
+                if not clause:
+                    return None
+                if len(clause) == 1:
+                    pending.extend(clause)
+            simplified.add(clause)
+        clauses = simplified
+    return frozenset(clauses), assigned
+
+
+def components(clauses):
+    """
+    Returns the clauses split into groups that share no variables,
+    each a frozenset of clauses.
+    """
+    parent = dict()
+
+    def find(v):
+        while parent.setdefault(v, v) != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    for clause in clauses:
+        first = find(abs(next(iter(clause))))
+        for lit in clause:
+            root = find(abs(lit))
+            if root != first:
+                parent[root] = first
+
+    groups = dict()
+    for clause in clauses:
+        groups.setdefault(find(abs(next(iter(clause)))), []).append(clause)
+    return [frozenset(group) for group in groups.values()]
+
+
+def count_models(knowledge, symbols=None, counter=None):
+    """
+    Returns the number of models of knowledge over its symbols, or over
+    the given set of symbol names, which must include them.
+    """
+    cnf = CNF()
+    for name in sorted(symbols if symbols is not None else knowledge.symbols()):
+        cnf.variable(name)
+    cnf.add(knowledge)
+    clauses = frozenset(frozenset(clause) for clause in cnf.clauses)
+    counter = counter or ModelCounter()
+    return counter.count(clauses) * 2 ** (cnf.count - len(variables(clauses)))
+
+
+def probability(query, knowledge):
+    """
+    Returns the fraction of the models of knowledge in which query is true,
+    i.e. P(query | knowledge) when every model is equally likely.
+    """
+    symbols = set.union(knowledge.symbols(), query.symbols())
+    counter = ModelCounter()
+    total = count_models(knowledge, symbols, counter)
+    if total == 0:
+        raise Exception("knowledge base has no models")
+    return count_models(And(knowledge, query), symbols, counter) / total
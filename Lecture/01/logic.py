@@ -1,4 +1,13 @@
 import itertools
+import math
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+class EvaluationException(Exception):
+    pass
 
 
 class Sentence():
@@ -15,6 +24,35 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def partial(self, model):
+        """
+        Evaluates the logical sentence under a model that may leave some
+        symbols unassigned: returns True or False if the assigned symbols
+        decide the sentence, else None.
+        """
+        raise Exception("nothing to evaluate")
+
+    def source(self, index):
+        """
+        Returns a Python expression evaluating the sentence on a tuple v of
+        truth values, where index maps each symbol name to its position.
+        """
+        raise Exception("nothing to evaluate")
+
+    def compile(self, symbols):
+        """
+        Returns a function that evaluates the logical sentence on a tuple
+        of truth values, one for each symbol name in symbols, in order.
+        Sentences nested too deeply for Python to compile are evaluated
+        with evaluate() instead.
+        """
+        index = {name: i for i, name in enumerate(symbols)}
+        try:
+            return eval(f"lambda v: {self.source(index)}")
+        except (SyntaxError, RecursionError, MemoryError):
+            symbols = list(symbols)
+            return lambda v: self.evaluate(dict(zip(symbols, v)))
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -68,6 +106,15 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def partial(self, model):
+        return model.get(self.name)
+
+    def source(self, index):
+        try:
+            return f"v[{index[self.name]}]"
+        except KeyError:
+            raise EvaluationException(f"variable {self.name} not in model")
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -92,6 +139,13 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def partial(self, model):
+        value = self.operand.partial(model)
+        return None if value is None else not value
+
+    def source(self, index):
+        return f"(not {self.operand.source(index)})"
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -129,6 +183,22 @@ class And(Sentence):
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
+    def source(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(conjunct.source(index)
+                                  for conjunct in self.conjuncts) + ")"
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -160,6 +230,22 @@ class Or(Sentence):
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
+    def source(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(disjunct.source(index)
+                                 for disjunct in self.disjuncts) + ")"
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -191,6 +277,21 @@ class Implication(Sentence):
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def partial(self, model):
+        antecedent = self.antecedent.partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
+    def source(self, index):
+        return (f"((not {self.antecedent.source(index)})"
+                f" or {self.consequent.source(index)})")
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -217,47 +318,631 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
+    def partial(self, model):
+        left = self.left.partial(model)
+        if left is None:
+            return None
+        right = self.right.partial(model)
+        if right is None:
+            return None
+        return left == right
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def source(self, index):
+        return f"({self.left.source(index)} == {self.right.source(index)})"
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
 
-        # If model has an assignment for each symbol
-        if not symbols:
+class Frozen():
+    """
+    Mixin for interned sentences, which are never modified: their hash
+    and symbols are computed once, when intern() creates them.
+    """
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+    def __eq__(self, other):
+        return self is other or super().__eq__(other)
+
+    def __hash__(self):
+        return self._hash
+
+    def symbols(self):
+        return set(self._symbols)
+
+    def add(self, conjunct):
+        raise TypeError("interned sentences cannot be modified")
+
+
+class FrozenSymbol(Frozen, Symbol):
+    pass
+
+
+class FrozenNot(Frozen, Not):
+    pass
+
+
+class FrozenAnd(Frozen, And):
+    pass
+
+
+class FrozenOr(Frozen, Or):
+    pass
+
+
+class FrozenImplication(Frozen, Implication):
+    pass
+
+
+class FrozenBiconditional(Frozen, Biconditional):
+    pass
+
+
+# Interned sentences by kind and the ids of their (interned) children.
+# A sentence keeps its children alive, so ids in live keys stay valid.
+interned = weakref.WeakValueDictionary()
+
+
+def intern(sentence):
+    """
+    Returns the interned copy of sentence: structurally identical sentences
+    are interned to the same object, sharing their subsentences.
+    """
+    if isinstance(sentence, Frozen):
+        return sentence
+    if isinstance(sentence, Symbol):
+        kind, children = FrozenSymbol, []
+        key = ("symbol", sentence.name)
+    else:
+        if isinstance(sentence, Not):
+            kind, children = FrozenNot, [sentence.operand]
+        elif isinstance(sentence, And):
+            kind, children = FrozenAnd, sentence.conjuncts
+        elif isinstance(sentence, Or):
+            kind, children = FrozenOr, sentence.disjuncts
+        elif isinstance(sentence, Implication):
+            kind, children = FrozenImplication, [sentence.antecedent,
+                                                 sentence.consequent]
+        elif isinstance(sentence, Biconditional):
+            kind, children = FrozenBiconditional, [sentence.left,
+                                                   sentence.right]
         else:
+            raise TypeError("must be a logical sentence")
+        children = [intern(child) for child in children]
+        key = (kind, tuple(id(child) for child in children))
+
+    node = interned.get(key)
+    if node is None:
+        if kind is FrozenSymbol:
+            node = FrozenSymbol(sentence.name)
+            node._symbols = frozenset([sentence.name])
+        else:
+            node = kind(*children)
+            node._symbols = frozenset().union(
+                *[child._symbols for child in children]
+            )
+
+        # Same hash as the equivalent sentence that is not interned
+        node._hash = super(Frozen, node).__hash__()
+        interned[key] = node
+    return node
+
+
+class KnowledgeBuilder():
+    """
+    Builds a knowledge base one sentence at a time. Every sentence added is
+    interned and duplicates are dropped; build() returns the conjunction.
+    """
+
+    def __init__(self, *sentences):
+        self.conjuncts = []
+        self.known = set()
+        self.names = set()
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        Sentence.validate(sentence)
+        sentence = intern(sentence)
+        if sentence not in self.known:
+            self.known.add(sentence)
+            self.conjuncts.append(sentence)
+            self.names |= sentence._symbols
+
+    def symbols(self):
+        return set(self.names)
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+    def build(self):
+        """Returns the knowledge base as an interned And."""
+        return intern(And(*self.conjuncts))
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+def model_check(knowledge, query, stats=None):
+    """
+    Checks if knowledge base entails query.
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+    If stats is a dict, stats["models"] is set to the number of models
+    enumerated.
+    """
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = list(set.union(knowledge.symbols(), query.symbols()))
+
+    # Compile both sentences to functions of a tuple of truth values
+    knowledge = knowledge.compile(symbols)
+    query = query.compile(symbols)
+
+    # In every model where knowledge base is true, query must also be true
+    entailed = True
+    visited = 0
+    models = itertools.product((True, False), repeat=len(symbols))
+    for visited, model in enumerate(models, 1):
+        if knowledge(model) and not query(model):
+            entailed = False
+            break
+    if stats is not None:
+        stats["models"] = visited
+    return entailed
+
+
+# Compiled sentences and the cancellation flag of a parallel_model_check
+# worker process, set up once per process by init_worker()
+worker = dict()
+
+# Models a worker checks between looks at the cancellation flag
+CANCEL_INTERVAL = 4096
+
+
+def init_worker(knowledge, query, symbols, cancelled):
+    worker["knowledge"] = knowledge.compile(symbols)
+    worker["query"] = query.compile(symbols)
+    worker["free"] = len(symbols)
+    worker["cancelled"] = cancelled
+
+
+def check_prefix(prefix):
+    """
+    Checks entailment in every model that starts with the truth values
+    in prefix. Gives up (returning True) once cancelled.
+    """
+    knowledge, query = worker["knowledge"], worker["query"]
+    cancelled = worker["cancelled"]
+    rest = itertools.product((True, False), repeat=worker["free"] - len(prefix))
+    for n, values in enumerate(rest):
+        model = prefix + values
+        if knowledge(model) and not query(model):
+            return False
+        if n % CANCEL_INTERVAL == 0 and cancelled.is_set():
+            return True
+    return True
+
+
+def parallel_model_check(knowledge, query, split=None, workers=None):
+    """
+    Checks if knowledge base entails query, like model_check, across
+    worker processes. The first split symbols are fixed in each of their
+    2^split combinations and every combination is checked separately;
+    all workers stop as soon as one of them finds a counter-model.
+    """
+    symbols = list(set.union(knowledge.symbols(), query.symbols()))
+    workers = workers or os.cpu_count()
+    if split is None:
+        split = math.ceil(math.log2(workers * 4))
+    split = min(split, len(symbols))
+
+    cancelled = multiprocessing.Event()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(knowledge, query, symbols, cancelled)) as executor:
+        futures = [executor.submit(check_prefix, prefix)
+                   for prefix in itertools.product((True, False), repeat=split)]
+        for future in as_completed(futures):
+            if not future.result():
+                cancelled.set()
+                for future in futures:
+                    future.cancel()
+                return False
+    return True
+
+
+def occurrences(sentence, counts=None):
+    """
+    Returns a dict mapping each symbol name to the number of times
+    it appears in sentence.
+    """
+    counts = dict() if counts is None else counts
+    if isinstance(sentence, Symbol):
+        counts[sentence.name] = counts.get(sentence.name, 0) + 1
+    elif isinstance(sentence, Not):
+        occurrences(sentence.operand, counts)
+    elif isinstance(sentence, And):
+        for conjunct in sentence.conjuncts:
+            occurrences(conjunct, counts)
+    elif isinstance(sentence, Or):
+        for disjunct in sentence.disjuncts:
+            occurrences(disjunct, counts)
+    elif isinstance(sentence, Implication):
+        occurrences(sentence.antecedent, counts)
+        occurrences(sentence.consequent, counts)
+    elif isinstance(sentence, Biconditional):
+        occurrences(sentence.left, counts)
+        occurrences(sentence.right, counts)
+    return counts
+
+
+def pruning_check(knowledge, query, stats=None):
+    """
+    Checks if knowledge base entails query, like model_check, but assigns
+    symbols one at a time, most frequent first, and evaluates both
+    sentences under each partial model. A branch is abandoned as soon as
+    knowledge is false in it, or knowledge is true and query is decided.
+
+    If stats is a dict, stats["models"] is set to the number of (partial)
+    models visited, against 2^n for model_check.
+    """
+
+    counts = occurrences(query, occurrences(knowledge))
+    order = sorted(counts, key=lambda name: (-counts[name], name))
+    visited = 0
+
+    def check_all(model, i):
+        """Checks if knowledge base entails query below a partial model."""
+        nonlocal visited
+        visited += 1
+
+        # No model below here satisfies the knowledge base
+        kb = knowledge.partial(model)
+        if kb is False:
+            return True
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+        # Query has the same value in every model below here
+        if kb is True:
+            q = query.partial(model)
+            if q is not None:
+                return q
+
+        # Assign the next symbol both ways
+        p = order[i]
+        model[p] = True
+        entailed = check_all(model, i + 1)
+        if entailed:
+            model[p] = False
+            entailed = check_all(model, i + 1)
+        del model[p]
+        return entailed
+
+    entailed = check_all(dict(), 0)
+    if stats is not None:
+        stats["models"] = visited
+    return entailed
+
+
+YES = "YES"
+NO = "NO"
+MAYBE = "MAYBE"
+
+
+def model_check_many(knowledge, queries, stats=None):
+    """
+    Checks what knowledge base entails about each query, enumerating the
+    models once for all of them. Returns a dict mapping each query to YES
+    if knowledge entails it, NO if knowledge entails its negation, and
+    MAYBE otherwise.
+
+    If stats is a dict, stats["models"] is set to the number of models
+    enumerated.
+    """
+
+    # Get all symbols in knowledge and every query
+    symbols = list(set.union(knowledge.symbols(),
+                             *[query.symbols() for query in queries]))
+
+    # Whether each query has been true / false in some model of knowledge
+    seen_true = dict.fromkeys(queries, False)
+    seen_false = dict.fromkeys(queries, False)
+    undecided = list(queries)
+
+    evaluate = knowledge.compile(symbols)
+    compiled = {query: query.compile(symbols) for query in queries}
+
+    visited = 0
+    models = itertools.product((True, False), repeat=len(symbols))
+    for visited, model in enumerate(models, 1):
+        if not evaluate(model):
+            continue
+        for query in undecided:
+            if compiled[query](model):
+                seen_true[query] = True
+            else:
+                seen_false[query] = True
+
+        # Stop as soon as every query is known to be MAYBE
+        undecided = [query for query in undecided
+                     if not (seen_true[query] and seen_false[query])]
+        if not undecided:
+            break
+
+    if stats is not None:
+        stats["models"] = visited
+    answers = dict()
+    for query in queries:
+        if not seen_false[query]:
+            answers[query] = YES
+        elif not seen_true[query]:
+            answers[query] = NO
+        else:
+            answers[query] = MAYBE
+    return answers
+
+
+class CNF():
+    """
+    Clauses in conjunctive normal form, built from logical sentences with
+    the Tseitin transformation: every compound sentence gets a fresh
+    variable that is made equivalent to it, so the clauses grow linearly
+    with the sentence instead of exponentially.
+
+    Variables are positive integers and literals are signed variables.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.variables = dict()
+        self.count = 0
+        self.literals = dict()
+
+    def variable(self, name=None):
+        """Returns the variable for a symbol name, or a fresh variable."""
+        if name is not None and name in self.variables:
+            return self.variables[name]
+        self.count += 1
+        if name is not None:
+            self.variables[name] = self.count
+        return self.count
+
+    def add(self, sentence):
+        """Adds clauses requiring sentence to be true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal that is equivalent to sentence."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        v = self.variable()
+        if isinstance(sentence, And):
+            operands = [self.literal(c) for c in sentence.conjuncts]
+            self.clauses.extend([-v, a] for a in operands)
+            self.clauses.append([v] + [-a for a in operands])
+        elif isinstance(sentence, Or):
+            operands = [self.literal(d) for d in sentence.disjuncts]
+            self.clauses.extend([v, -a] for a in operands)
+            self.clauses.append([-v] + operands)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            self.clauses.extend([[-v, -a, b], [v, a], [v, -b]])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            self.clauses.extend([[-v, -a, b], [-v, a, -b],
+                                 [v, a, b], [v, -a, -b]])
+        else:
+            raise TypeError("must be a logical sentence")
+        self.literals[sentence] = v
+        return v
+
+
+class Solver():
+    """
+    CDCL satisfiability solver: unit propagation over two watched literals
+    per clause, first-UIP clause learning with non-chronological
+    backjumping, and decisions on the most active variable.
+    """
+
+    def __init__(self, count, clauses):
+        self.count = count
+        self.value = [0] * (count + 1)
+        self.level = [0] * (count + 1)
+        self.reason = [None] * (count + 1)
+        self.activity = [0.0] * (count + 1)
+        self.phase = [-1] * (count + 1)
+        self.bump = 1.0
+        self.trail = []
+        self.limits = []
+        self.head = 0
+        self.watches = {lit: [] for v in range(1, count + 1) for lit in (v, -v)}
+        self.clauses = []
+        self.conflict = False
+
+        for clause in clauses:
+            clause = list(dict.fromkeys(clause))
+            if any(-lit in clause for lit in clause):
+                continue
+            self.add_clause(clause)
+
+    def add_clause(self, clause):
+        """Adds a clause at decision level 0."""
+        clause = [lit for lit in clause if self.lit_value(lit) != -1]
+        if any(self.lit_value(lit) == 1 for lit in clause):
+            return
+        if not clause:
+            self.conflict = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+        else:
+            self.clauses.append(clause)
+            self.watches[clause[0]].append(clause)
+            self.watches[clause[1]].append(clause)
+
+    def lit_value(self, lit):
+        """Returns 1 if lit is true, -1 if false, 0 if unassigned."""
+        v = self.value[abs(lit)]
+        return v if lit > 0 else -v
+
+    def assign(self, lit, reason):
+        var = abs(lit)
+        self.value[var] = 1 if lit > 0 else -1
+        self.level[var] = len(self.limits)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses.
+        Returns a clause that became false, or None.
+        """
+        while self.head < len(self.trail):
+            false_lit = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches[false_lit]
+            kept = []
+            for n, clause in enumerate(watching):
+
+                # Keep the false literal in the second watched position
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.lit_value(clause[0]) == 1:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal to watch
+                for i in range(2, len(clause)):
+                    if self.lit_value(clause[i]) != -1:
+                        clause[1], clause[i] = clause[i], clause[1]
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.lit_value(clause[0]) == -1:
+                        kept.extend(watching[n + 1:])
+                        self.watches[false_lit] = kept
+                        return clause
+                    self.assign(clause[0], clause)
+            self.watches[false_lit] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (learnt clause, level to backjump to) for a conflict, with
+        the clause's first literal the only one at the current level.
+        """
+        current = len(self.limits)
+        learnt = [None]
+        seen = set()
+        pending = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in (clause if lit is None else clause[1:]):
+                var = abs(q)
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self.activity[var] += self.bump
+                    if self.level[var] == current:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+
+            # Resolve on the most recent literal involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(lit)]
+        learnt[0] = -lit
+        self.bump *= 1.05
+
+        if len(learnt) == 1:
+            return learnt, 0
+        second = max(range(1, len(learnt)), key=lambda i: self.level[abs(learnt[i])])
+        learnt[1], learnt[second] = learnt[second], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def backjump(self, level):
+        """Undoes every assignment made above level."""
+        if len(self.limits) <= level:
+            return
+        start = self.limits[level]
+        for lit in self.trail[start:]:
+            var = abs(lit)
+            self.phase[var] = self.value[var]
+            self.value[var] = 0
+            self.reason[var] = None
+        del self.trail[start:]
+        del self.limits[level:]
+        self.head = start
+
+    def decide(self):
+        """Returns the unassigned variable with the highest activity, or None."""
+        best = None
+        for var in range(1, self.count + 1):
+            if self.value[var] == 0 and (
+                best is None or self.activity[var] > self.activity[best]
+            ):
+                best = var
+        return best
+
+    def solve(self):
+        """Returns True if the clauses are satisfiable, False otherwise."""
+        if self.conflict:
+            return False
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.limits:
+                    return False
+                learnt, level = self.analyze(conflict)
+                self.backjump(level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.clauses.append(learnt)
+                    self.watches[learnt[0]].append(learnt)
+                    self.watches[learnt[1]].append(learnt)
+                    self.assign(learnt[0], learnt)
+            else:
+                var = self.decide()
+                if var is None:
+                    return True
+                self.limits.append(len(self.trail))
+                self.assign(var * self.phase[var], None)
+
+    def model(self, variables):
+        """Returns the satisfying assignment of named variables."""
+        return {name: self.value[v] == 1 for name, v in variables.items()}
+
+
+def satisfiable(sentence):
+    """Returns a model of sentence as a dict, or None if it has none."""
+    cnf = CNF()
+    cnf.add(sentence)
+    solver = Solver(cnf.count, cnf.clauses)
+    if not solver.solve():
+        return None
+    return solver.model(cnf.variables)
+
+
+def sat_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, like model_check, by showing
+    that knowledge ∧ ¬query has no model.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return not Solver(cnf.count, cnf.clauses).solve()
@@ -6,7 +6,7 @@ for i in range(4):
     for color in colors:
         symbols.append(Symbol(f"{color}{i}"))
 
-knowledge = And()
+knowledge = KnowledgeBuilder()
 
 # Each color has a position.
 for color in colors:
@@ -51,6 +51,8 @@ knowledge.add(And(
     Not(Symbol("yellow3"))
 ))
 
+knowledge = knowledge.build()
+
 for symbol in symbols:
-    if model_check(knowledge, symbol):
+    if sat_check(knowledge, symbol):
         print(symbol)
@@ -5,7 +5,7 @@ houses = ["Gryffindor", "Hufflepuff", "Ravenclaw", "Slytherin"]
 
 symbols = []
 
-knowledge = And()
+knowledge = KnowledgeBuilder()
 
 for person in people:
     for house in houses:
@@ -50,6 +50,8 @@ knowledge.add(
     Symbol("MinervaGryffindor")
 )
 
+knowledge = knowledge.build()
+
 for symbol in symbols:
-    if model_check(knowledge, symbol):
+    if sat_check(knowledge, symbol):
         print(symbol)
@@ -0,0 +1,169 @@
+"""
+Resolution theorem prover for logical sentences.
+
+Knowledge and the negated query are turned into conjunctive normal form
+over their own symbols, as clauses that are each a frozenset of signed
+integer literals, and resolved against each other until the empty clause
+appears (the query is entailed) or no new clauses can be derived (it is
+not). The work done depends on the size of the proof
+rather than on the 2^n models that model_check enumerates.
+"""
+
+import heapq
+
+from logic import *
+
+
+class Prover():
+    """
+    Given-clause resolution: clauses are taken smallest first from a queue
+    and resolved only against already processed clauses that contain a
+    complementary literal, found through an index from each literal to the
+    processed clauses that contain it. Tautologies are dropped, and clauses
+    subsumed by another clause are never kept.
+    """
+
+    def __init__(self, clauses):
+        self.processed = set()
+        self.index = dict()
+        self.queue = []
+        self.queued = set()
+        self.resolvents = 0
+        for clause in clauses:
+            self.push(frozenset(clause))
+
+    def push(self, clause):
+        """Queues a clause unless it is a tautology or already known."""
+        if any(-lit in clause for lit in clause):
+            return
+        if clause in self.queued or self.subsumed(clause):
+            return
+        self.queued.add(clause)
+        heapq.heappush(self.queue, (len(clause), sorted(clause), clause))
+
+    def subsumed(self, clause):
+        """Checks if a processed clause is a subset of clause."""
+        for lit in clause:
+            for other in self.index.get(lit, ()):
+                if other <= clause:
+                    return True
+        return False
+
+    def remove_subsumed(self, clause):
+        """Removes every processed clause that clause is a subset of."""
+        if not clause:
+            return
+        lit = min(clause, key=lambda lit: len(self.index.get(lit, ())))
+        for other in list(self.index.get(lit, ())):
+            if clause <= other:
+                self.processed.discard(other)
+                for l in other:
+                    self.index[l].discard(other)
+
+    def add(self, clause):
+        """Adds clause to the processed clauses and the index."""
+        self.remove_subsumed(clause)
+        self.processed.add(clause)
+        for lit in clause:
+            self.index.setdefault(lit, set()).add(clause)
+
+    def refute(self):
+        """Returns True if the clauses are unsatisfiable, False otherwise."""
+        while self.queue:
+            _, _, given = heapq.heappop(self.queue)
+            if not given:
+                return True
+            if given in self.processed or self.subsumed(given):
+                continue
+
+            resolvents = []
+            for lit in given:
+                for other in self.index.get(-lit, ()):
+                    resolvent = (given - {lit}) | (other - {-lit})
+                    self.resolvents += 1
+                    if not resolvent:
+                        return True
+                    resolvents.append(resolvent)
+            self.add(given)
+            for resolvent in resolvents:
+                self.push(resolvent)
+        return False
+
+
+def reduce(clauses):
+    """
+    Returns clauses without tautologies or clauses that another one subsumes.
+    """
+    kept = []
+    for clause in sorted(set(clauses), key=len):
+        if any(-lit in clause for lit in clause):
+            continue
+        if not any(other <= clause for other in kept):
+            kept.append(clause)
+    return kept
+
+
+def distribute(left, right):
+    """
+    Returns the clauses of the disjunction of two clause sets.
+    """
+    return reduce([a | b for a in left for b in right])
+
+
+def to_clauses(sentence, variables, positive=True):
+    """
+    Returns the clauses (over the integer ids in variables, which maps
+    symbol names to ids and gains an id for any new name) that are
+    equivalent to sentence if positive, or to its negation if not.
+    """
+    if isinstance(sentence, Symbol):
+        v = variables.setdefault(sentence.name, len(variables) + 1)
+        return [frozenset([v if positive else -v])]
+    if isinstance(sentence, Not):
+        return to_clauses(sentence.operand, variables, not positive)
+    if isinstance(sentence, (And, Or)):
+        operands = (sentence.conjuncts if isinstance(sentence, And)
+                    else sentence.disjuncts)
+        parts = [to_clauses(operand, variables, positive) for operand in operands]
+
+        # A conjunction (or a negated disjunction) is the union of its parts
+        if isinstance(sentence, And) == positive:
+            return reduce([clause for part in parts for clause in part])
+        result = [frozenset()]
+        for part in parts:
+            result = distribute(result, part)
+        return result
+    if isinstance(sentence, Implication):
+        if positive:
+            return distribute(to_clauses(sentence.antecedent, variables, False),
+                              to_clauses(sentence.consequent, variables, True))
+        return reduce(to_clauses(sentence.antecedent, variables, True)
+                      + to_clauses(sentence.consequent, variables, False))
+    if isinstance(sentence, Biconditional):
+        left_true = to_clauses(sentence.left, variables, True)
+        left_false = to_clauses(sentence.left, variables, False)
+        right_true = to_clauses(sentence.right, variables, True)
+        right_false = to_clauses(sentence.right, variables, False)
+        if positive:
+            return reduce(distribute(left_false, right_true)
+                          + distribute(left_true, right_false))
+        return reduce(distribute(left_true, right_true)
+                      + distribute(left_false, right_false))
+    raise TypeError("must be a logical sentence")
+
+
+def clauses(knowledge, query):
+    """
+    Returns the clauses of knowledge ∧ ¬query, as frozensets of literals.
+    """
+    variables = dict()
+    return reduce(to_clauses(knowledge, variables, True)
+                  + to_clauses(query, variables, False))
+
+
+def resolution_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, like model_check,
+    by deriving the empty clause from knowledge ∧ ¬query.
+    """
+    return Prover(clauses(knowledge, query)).refute()
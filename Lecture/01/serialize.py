@@ -0,0 +1,253 @@
+"""
+Text and binary formats for logical sentences.
+
+parse() reads the notation that Sentence.formula() writes (¬, ∧, ∨, =>
+and <=>) back into interned sentences. dumps()/loads() and save()/load()
+store a sentence as a compact binary DAG: every distinct subsentence is
+written once, after the subsentences it refers to, so a large generated
+knowledge base can be cached on disk instead of rebuilt.
+"""
+
+from logic import *
+
+OPERATORS = ["<=>", "=>", "¬", "∧", "∨", "(", ")"]
+
+
+def tokenize(text):
+    """
+    Returns the operators and symbol names in text. A symbol name is
+    everything between two operators, without surrounding spaces.
+    """
+    tokens = []
+    name = []
+    i = 0
+    while i < len(text):
+        for operator in OPERATORS:
+            if text.startswith(operator, i):
+                break
+        else:
+            name.append(text[i])
+            i += 1
+            continue
+        if "".join(name).strip():
+            tokens.append(("name", "".join(name).strip()))
+        name = []
+        tokens.append((operator, operator))
+        i += len(operator)
+    if "".join(name).strip():
+        tokens.append(("name", "".join(name).strip()))
+    return tokens
+
+
+class Parser():
+    """
+    Parser that keeps the open parentheses on a stack rather than the
+    Python call stack, so that it reads back sentences nested as deeply
+    as formula() can write them. From loosest to tightest binding:
+    <=>, => (right associative), ∨, ∧, ¬.
+    """
+
+    # Binary operators from loosest to tightest binding
+    BINARY = ["<=>", "=>", "∨", "∧"]
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+
+    def parse(self):
+        # Each open group holds its operands and binary operators read so
+        # far, alternating, and the number of ¬ before its "("
+        groups = [([], 0)]
+        negations = 0
+        for kind, value in self.tokens:
+            items = groups[-1][0]
+            if len(items) % 2 == 0:
+                if kind == "¬":
+                    negations += 1
+                elif kind == "(":
+                    groups.append(([], negations))
+                    negations = 0
+                elif kind == "name":
+                    items.append(self.negate(Symbol(value), negations))
+                    negations = 0
+                else:
+                    raise ValueError(f"expected name, found {value}")
+            elif kind in self.BINARY:
+                items.append(kind)
+            elif kind == ")" and len(groups) > 1:
+                items, before = groups.pop()
+                groups[-1][0].append(self.negate(self.combine(items), before))
+            else:
+                raise ValueError(f"unexpected {value}")
+
+        if len(groups[-1][0]) % 2 == 0:
+            raise ValueError("expected name, found end of formula")
+        if len(groups) > 1:
+            raise ValueError("expected ), found end of formula")
+        return self.combine(groups[0][0])
+
+    @staticmethod
+    def negate(sentence, negations):
+        for _ in range(negations):
+            sentence = Not(sentence)
+        return sentence
+
+    def combine(self, items, level=0):
+        """
+        Returns the sentence of a group without parentheses: operands
+        alternating with the binary operators of level and tighter ones.
+        """
+        if level == len(self.BINARY):
+            return items[0]
+        operator = self.BINARY[level]
+        parts = [[]]
+        for item in items:
+            if isinstance(item, str) and item == operator:
+                parts.append([])
+            else:
+                parts[-1].append(item)
+        operands = [self.combine(part, level + 1) for part in parts]
+        if len(operands) == 1:
+            return operands[0]
+        if operator == "<=>":
+            sentence = operands[0]
+            for operand in operands[1:]:
+                sentence = Biconditional(sentence, operand)
+            return sentence
+        if operator == "=>":
+            sentence = operands[-1]
+            for operand in reversed(operands[:-1]):
+                sentence = Implication(operand, sentence)
+            return sentence
+        if operator == "∨":
+            return Or(*operands)
+        return And(*operands)
+
+
+def parse(text):
+    """
+    Returns the interned sentence written as text in formula() notation.
+    An empty formula is an empty And, as And().formula() is empty.
+    """
+    if not text.strip():
+        return intern(And())
+    return intern(Parser(text).parse())
+
+
+# Binary format: MAGIC, the number of symbol names, each name as a length
+# and UTF-8 bytes, the number of nodes, each node as a kind and either a
+# name number (symbols) or its child count and child node numbers, and
+# finally the number of the root node. Every number is a varint.
+MAGIC = b"LKB1"
+KINDS = [Symbol, Not, And, Or, Implication, Biconditional]
+
+
+def write_varint(out, n):
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def read_varint(data, position):
+    n = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, position
+        shift += 7
+
+
+def children(sentence):
+    if isinstance(sentence, Not):
+        return [sentence.operand]
+    if isinstance(sentence, And):
+        return sentence.conjuncts
+    if isinstance(sentence, Or):
+        return sentence.disjuncts
+    if isinstance(sentence, Implication):
+        return [sentence.antecedent, sentence.consequent]
+    if isinstance(sentence, Biconditional):
+        return [sentence.left, sentence.right]
+    return []
+
+
+def dumps(sentence):
+    """Returns sentence in the binary format."""
+    sentence = intern(sentence)
+    names = dict()
+    numbers = dict()
+    nodes = bytearray()
+
+    def write(node):
+        """Writes node after its children, once, and returns its number."""
+        if id(node) in numbers:
+            return numbers[id(node)]
+        kids = [write(child) for child in children(node)]
+        kind = next(i for i, k in enumerate(KINDS) if isinstance(node, k))
+        nodes.append(kind)
+        if kind == 0:
+            write_varint(nodes, names.setdefault(node.name, len(names)))
+        else:
+            write_varint(nodes, len(kids))
+            for kid in kids:
+                write_varint(nodes, kid)
+        numbers[id(node)] = len(numbers)
+        return numbers[id(node)]
+
+    root = write(sentence)
+    out = bytearray(MAGIC)
+    write_varint(out, len(names))
+    for name in names:
+        encoded = name.encode("utf-8")
+        write_varint(out, len(encoded))
+        out += encoded
+    write_varint(out, len(numbers))
+    out += nodes
+    write_varint(out, root)
+    return bytes(out)
+
+
+def loads(data):
+    """Returns the interned sentence stored in data by dumps()."""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a logical sentence file")
+    position = len(MAGIC)
+
+    count, position = read_varint(data, position)
+    names = []
+    for _ in range(count):
+        length, position = read_varint(data, position)
+        names.append(data[position:position + length].decode("utf-8"))
+        position += length
+
+    count, position = read_varint(data, position)
+    nodes = []
+    for _ in range(count):
+        kind = KINDS[data[position]]
+        position += 1
+        if kind is Symbol:
+            n, position = read_varint(data, position)
+            nodes.append(intern(Symbol(names[n])))
+        else:
+            arity, position = read_varint(data, position)
+            kids = []
+            for _ in range(arity):
+                n, position = read_varint(data, position)
+                kids.append(nodes[n])
+            nodes.append(intern(kind(*kids)))
+    root, position = read_varint(data, position)
+    return nodes[root]
+
+
+def save(sentence, path):
+    """Writes sentence to the file at path in the binary format."""
+    with open(path, "wb") as f:
+        f.write(dumps(sentence))
+
+
+def load(path):
+    """Reads the sentence saved in the file at path."""
+    with open(path, "rb") as f:
+        return loads(f.read())
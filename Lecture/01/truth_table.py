@@ -0,0 +1,104 @@
+"""
+Vectorized truth-table evaluation of logical sentences with NumPy.
+
+Every symbol becomes a bit array over all 2^n assignments of the n symbols,
+packed 64 assignments to a uint64 word, and sentences are evaluated over all
+assignments at once with &, | and ~. Entailment then takes a handful of
+array operations instead of one recursive evaluate() call per model.
+"""
+
+import numpy as np
+
+from logic import *
+
+# Assignments are numbered so that symbol i is true in assignment m when
+# bit i of m is set. For the first six symbols that pattern repeats
+# inside every 64-bit word.
+WORD_PATTERNS = [
+    0xAAAAAAAAAAAAAAAA,
+    0xCCCCCCCCCCCCCCCC,
+    0xF0F0F0F0F0F0F0F0,
+    0xFF00FF00FF00FF00,
+    0xFFFF0000FFFF0000,
+    0xFFFFFFFF00000000,
+]
+
+# 2^30 assignments already take 128MB per array
+MAX_SYMBOLS = 30
+
+ALL = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+class TruthTable():
+    """
+    Packed bit arrays over every assignment of a list of symbol names.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = sorted(symbols)
+        n = len(self.symbols)
+        if n > MAX_SYMBOLS:
+            raise ValueError(f"too many symbols for a truth table: {n}")
+        self.words = max(1, 2 ** n // 64)
+
+        # Bits of assignments that exist, for fewer than six symbols
+        self.valid = np.full(self.words, ALL)
+        if n < 6:
+            self.valid[0] = np.uint64(2 ** 2 ** n - 1)
+
+        index = np.arange(self.words, dtype=np.uint64)
+        self.columns = dict()
+        for i, name in enumerate(self.symbols):
+            if i < 6:
+                column = np.full(self.words, np.uint64(WORD_PATTERNS[i]))
+            else:
+                bit = (index >> np.uint64(i - 6)) & np.uint64(1)
+                column = np.where(bit == 1, ALL, np.uint64(0))
+            self.columns[name] = column & self.valid
+
+    def evaluate(self, sentence):
+        """
+        Returns the packed truth values of sentence in every assignment.
+        """
+        if isinstance(sentence, Symbol):
+            try:
+                return self.columns[sentence.name]
+            except KeyError:
+                raise Exception(f"variable {sentence.name} not in truth table")
+        if isinstance(sentence, Not):
+            return ~self.evaluate(sentence.operand) & self.valid
+        if isinstance(sentence, And):
+            result = self.valid.copy()
+            for conjunct in sentence.conjuncts:
+                result &= self.evaluate(conjunct)
+            return result
+        if isinstance(sentence, Or):
+            result = np.zeros(self.words, dtype=np.uint64)
+            for disjunct in sentence.disjuncts:
+                result |= self.evaluate(disjunct)
+            return result
+        if isinstance(sentence, Implication):
+            return (~self.evaluate(sentence.antecedent)
+                    | self.evaluate(sentence.consequent)) & self.valid
+        if isinstance(sentence, Biconditional):
+            return ~(self.evaluate(sentence.left)
+                     ^ self.evaluate(sentence.right)) & self.valid
+        raise TypeError("must be a logical sentence")
+
+    def entails(self, knowledge, query):
+        """
+        Checks if knowledge entails query, where knowledge may be
+        a sentence or the result of evaluate().
+        """
+        if isinstance(knowledge, Sentence):
+            knowledge = self.evaluate(knowledge)
+        return not (knowledge & ~self.evaluate(query)).any()
+
+
+def truth_table_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, like model_check,
+    evaluating every model at once.
+    """
+    table = TruthTable(set.union(knowledge.symbols(), query.symbols()))
+    return table.entails(knowledge, query)
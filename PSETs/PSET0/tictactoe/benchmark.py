@@ -0,0 +1,198 @@
+"""
+Headless self-play benchmark for the tictactoe engines.
+
+Plays a number of games between two engines, each game starting from a few
+random moves, and reports result tallies, nodes searched per second and
+per-move latency percentiles for each engine. Exits with status 1 if an
+engine that should play perfectly ends a game worse than the value of the
+position it was handed after the opening. Those engines search 3x3 boards
+with k = 3 to the end, so they cannot be used with other --board sizes.
+
+Usage: python benchmark.py [--games N] [--opening PLIES] [--seed SEED]
+                           [--board HEIGHT WIDTH K] [X_ENGINE] [O_ENGINE]
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+
+import tictactoe as ttt
+from mcts import MCTS
+
+
+def play_minimax_without_alpha_beta_pruning(board, k):
+    ttt.nodes = 0
+    return ttt.minimax_without_alpha_beta_pruning(board), ttt.nodes
+
+
+def play_alpha_beta(board, k):
+    ttt.nodes = 0
+    if ttt.player(board) == ttt.X:
+        action = ttt.max_value_alpha_beta(board, -math.inf, math.inf)[1]
+    else:
+        action = ttt.min_value_alpha_beta(board, -math.inf, math.inf)[1]
+    return action, ttt.nodes
+
+
+def play_minimax(board, k):
+    return ttt.minimax(board), None
+
+
+def play_negamax(board, k):
+    search = ttt.Negamax(k)
+    state = ttt.GameState(board, k)
+    action, _ = search.root(state, state.empty)
+    return action, search.nodes
+
+
+def play_iterative_deepening(board, k):
+    return ttt.iterative_deepening(board, k, time_limit=0.5), None
+
+
+def play_mcts(board, k):
+    return MCTS(k, playouts=2000).choose(board), None
+
+
+def play_random(board, k):
+    return random.choice(sorted(ttt.actions(board))), None
+
+
+# Engines by name: function(board, k) -> (action, nodes searched or None),
+# and whether the engine plays perfectly, which it only does on 3x3 boards
+# with k = 3: the list board searches ignore k, and negamax searches to the end
+ENGINES = {
+    "minimax_without_alpha_beta_pruning": (play_minimax_without_alpha_beta_pruning, True),
+    "alpha_beta": (play_alpha_beta, True),
+    "minimax": (play_minimax, True),
+    "negamax": (play_negamax, True),
+    "iterative_deepening": (play_iterative_deepening, False),
+    "mcts": (play_mcts, False),
+    "random": (play_random, False),
+}
+
+
+class Stats():
+    """
+    Per-engine tallies across all games.
+    """
+
+    def __init__(self):
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.latencies = []
+        self.nodes = 0
+        self.node_time = 0.0
+        self.violations = 0
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of values (nearest rank).
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def game_value(board, k):
+    """
+    Returns the value of board under perfect play (1 if X wins, -1 if O
+    wins, 0 for a draw) if it is a 3x3 board, else None.
+    """
+    if (len(board), len(board[0]), k) != (3, 3, 3):
+        return None
+    entry = ttt.book_lookup(board)
+    if entry is not None:
+        return entry[0]
+    if ttt.player(board) == ttt.X:
+        return ttt.max_value_alpha_beta(board, -math.inf, math.inf)[0]
+    return ttt.min_value_alpha_beta(board, -math.inf, math.inf)[0]
+
+
+def opening(height, width, k, plies):
+    """
+    Returns a non-terminal board after up to plies random moves.
+    """
+    while True:
+        board = ttt.initial_state(height, width)
+        for _ in range(plies):
+            board = ttt.result(board, random.choice(sorted(ttt.actions(board))))
+            if ttt.terminal(board, k):
+                break
+        if not ttt.terminal(board, k):
+            return board
+
+
+def play_game(board, k, engines, stats):
+    """
+    Plays out board with engines[X] and engines[O], updating stats.
+    """
+    value = game_value(board, k)
+    while not ttt.terminal(board, k):
+        mark = ttt.player(board)
+        name = engines[mark]
+        start = time.perf_counter()
+        action, nodes = ENGINES[name][0](board, k)
+        elapsed = time.perf_counter() - start
+        stats[name].latencies.append(elapsed)
+        if nodes is not None:
+            stats[name].nodes += nodes
+            stats[name].node_time += elapsed
+        board = ttt.result(board, action)
+
+    result = ttt.utility(board, k)
+    for mark, sign in ((ttt.X, 1), (ttt.O, -1)):
+        s = stats[engines[mark]]
+        if result * sign > 0:
+            s.wins += 1
+        elif result * sign < 0:
+            s.losses += 1
+        else:
+            s.draws += 1
+        if ENGINES[engines[mark]][1] and value is not None and result * sign < value * sign:
+            s.violations += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tictactoe self-play benchmark")
+    parser.add_argument("x_engine", nargs="?", default="minimax", choices=ENGINES)
+    parser.add_argument("o_engine", nargs="?", default="negamax", choices=ENGINES)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--opening", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--board", type=int, nargs=3, default=(3, 3, 3),
+                        metavar=("HEIGHT", "WIDTH", "K"))
+    args = parser.parse_args()
+    if tuple(args.board) != (3, 3, 3):
+        for engine in (args.x_engine, args.o_engine):
+            if ENGINES[engine][1]:
+                parser.error(f"{engine} only plays 3x3 boards with k = 3")
+    random.seed(args.seed)
+    height, width, k = args.board
+
+    engines = {ttt.X: args.x_engine, ttt.O: args.o_engine}
+    stats = {name: Stats() for name in engines.values()}
+    for _ in range(args.games):
+        play_game(opening(height, width, k, args.opening), k, engines, stats)
+
+    failed = False
+    for name, s in stats.items():
+        print(f"{name}:")
+        print(f"    wins {s.wins}, draws {s.draws}, losses {s.losses}")
+        if s.latencies:
+            p50, p90, p99 = (percentile(s.latencies, p) * 1000 for p in (50, 90, 99))
+            print(f"    latency ms: p50 {p50:.2f}, p90 {p90:.2f}, p99 {p99:.2f}, "
+                  f"max {max(s.latencies) * 1000:.2f}")
+        if s.node_time:
+            print(f"    nodes/second: {s.nodes / s.node_time:.0f}")
+        if s.violations:
+            print(f"    lost {s.violations} game(s) it should not have lost")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Builds the tictactoe opening book: solves every position reachable on the
+3x3 board once and writes the best move and value of each to book.bin,
+which tictactoe.py loads at startup.
+
+Usage: python book.py [path]
+"""
+
+import sys
+
+import tictactoe as ttt
+
+
+def solve(board, table):
+    """
+    Returns the minimax value of board, recording (value, action)
+    for it and every position below it in table.
+    """
+    index = ttt.board_index(board)
+    if index in table:
+        return table[index][0]
+    if ttt.terminal(board):
+        table[index] = (ttt.utility(board), None)
+        return table[index][0]
+
+    maximizing = ttt.player(board) == ttt.X
+    best_v, best = None, None
+    for action in sorted(ttt.actions(board)):
+        v = solve(ttt.result(board, action), table)
+        if best_v is None or (v > best_v if maximizing else v < best_v):
+            best_v, best = v, action
+    table[index] = (best_v, best)
+    return best_v
+
+
+def build(path=ttt.BOOK_PATH):
+    """
+    Solves the game and writes the opening book to path.
+    Returns the number of positions with a move.
+    """
+    table = dict()
+    solve(ttt.initial_state(), table)
+
+    data = bytearray([ttt.NO_MOVE]) * ttt.BOOK_SIZE
+    for index, (value, action) in table.items():
+        if action is not None:
+            i, j = action
+            data[index] = (value + 1) << 4 | (3 * i + j)
+    with open(path, "wb") as f:
+        f.write(data)
+    return sum(1 for _, action in table.values() if action is not None)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else ttt.BOOK_PATH
+    positions = build(path)
+    print(f"Wrote {positions} positions to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Monte Carlo tree search (UCT) player for tictactoe boards of any size.
+"""
+
+import math
+import random
+import time
+
+import tictactoe as ttt
+
+
+class MCTS():
+    """
+    Anytime tictactoe player. Each call to choose() runs either a fixed
+    number of playouts or as many as fit in time_limit seconds.
+
+    Nodes are stored in parallel lists indexed by node id (0 is the root),
+    and the part of the tree below the moves actually played is kept
+    between calls.
+    """
+
+    def __init__(self, k=None, playouts=1000, time_limit=None,
+                 exploration=math.sqrt(2)):
+        self.k = k
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.board = None
+        self.clear()
+
+    def clear(self):
+        """
+        Forgets the whole tree.
+        """
+        self.parent = []
+        self.action = []
+        self.mark = []
+        self.children = []
+        self.untried = []
+        self.visits = []
+        self.wins = []
+
+    def add_node(self, parent, action, mark, board):
+        """
+        Adds a node for board, reached by mark playing action
+        from parent, and returns its id.
+        """
+        node = len(self.parent)
+        self.parent.append(parent)
+        self.action.append(action)
+        self.mark.append(mark)
+        self.children.append([])
+        if ttt.terminal(board, self.k):
+            self.untried.append([])
+        else:
+            moves = list(ttt.actions(board))
+            random.shuffle(moves)
+            self.untried.append(moves)
+        self.visits.append(0)
+        self.wins.append(0.0)
+        return node
+
+    def choose(self, board):
+        """
+        Returns the action MCTS considers best for the current player.
+        """
+        if ttt.terminal(board, self.k):
+            return None
+        self.reuse(board)
+
+        # At least one playout, so that the root has a child to choose
+        if self.time_limit is not None:
+            deadline = time.perf_counter() + self.time_limit
+            self.playout()
+            while time.perf_counter() < deadline:
+                self.playout()
+        else:
+            for _ in range(max(1, self.playouts)):
+                self.playout()
+
+        best = max(self.children[0], key=lambda child: self.visits[child])
+        return self.action[best]
+
+    def reuse(self, board):
+        """
+        Makes the node for board the root, keeping its subtree if board
+        follows on from the previous root, else starts a new tree.
+        """
+        node = self.find(board)
+        if node is None:
+            self.clear()
+            self.board = [row[:] for row in board]
+            self.add_node(None, None, opponent(ttt.player(board)), board)
+        elif node != 0:
+            self.reroot(node)
+            self.board = [row[:] for row in board]
+
+    def find(self, board):
+        """
+        Returns the node of the current tree for board, or None.
+        """
+        if (self.board is None or len(board) != len(self.board)
+                or len(board[0]) != len(self.board[0])):
+            return None
+        played = set()
+        for i, row in enumerate(board):
+            for j, itm in enumerate(row):
+                if itm != self.board[i][j]:
+                    if self.board[i][j] is not ttt.EMPTY:
+                        return None
+                    played.add((i, j))
+
+        # Follow the moves played since the last call down the tree
+        node = 0
+        while played:
+            for child in self.children[node]:
+                i, j = self.action[child]
+                if (i, j) in played and board[i][j] == self.mark[child]:
+                    played.remove((i, j))
+                    node = child
+                    break
+            else:
+                return None
+        return node
+
+    def reroot(self, root):
+        """
+        Compacts the tree to the subtree below root, which becomes node 0.
+        """
+        old = (self.action, self.mark, self.children, self.untried,
+               self.visits, self.wins)
+        action, mark, children, untried, visits, wins = old
+        self.clear()
+        queue = [(root, None)]
+        for old_node, parent in queue:
+            node = len(self.parent)
+            self.parent.append(parent)
+            self.action.append(action[old_node])
+            self.mark.append(mark[old_node])
+            self.children.append([])
+            self.untried.append(untried[old_node])
+            self.visits.append(visits[old_node])
+            self.wins.append(wins[old_node])
+            if parent is not None:
+                self.children[parent].append(node)
+            queue.extend((child, node) for child in children[old_node])
+
+    def select(self, node):
+        """
+        Returns the child of node with the highest UCT score.
+        """
+        log_n = math.log(self.visits[node])
+        return max(
+            self.children[node],
+            key=lambda child: (self.wins[child] / self.visits[child]
+                               + self.exploration
+                               * math.sqrt(log_n / self.visits[child]))
+        )
+
+    def playout(self):
+        """
+        Runs one selection, expansion, simulation and backpropagation step.
+        """
+        board = [row[:] for row in self.board]
+        node = 0
+
+        # Selection
+        while not self.untried[node] and self.children[node]:
+            node = self.select(node)
+            i, j = self.action[node]
+            board[i][j] = self.mark[node]
+
+        # Expansion
+        if self.untried[node]:
+            i, j = self.untried[node].pop()
+            mark = opponent(self.mark[node])
+            board[i][j] = mark
+            child = self.add_node(node, (i, j), mark, board)
+            self.children[node].append(child)
+            node = child
+
+        # Simulation
+        winner = self.simulate(board, opponent(self.mark[node]))
+
+        # Backpropagation
+        while node is not None:
+            self.visits[node] += 1
+            if winner == self.mark[node]:
+                self.wins[node] += 1
+            elif winner is None:
+                self.wins[node] += 0.5
+            node = self.parent[node]
+
+    def simulate(self, board, mark):
+        """
+        Plays random moves on board, starting with mark,
+        and returns the winner, if there is one.
+        """
+        state = ttt.GameState(board, self.k)
+        state.turn = mark
+        moves = list(state.actions())
+        random.shuffle(moves)
+        while not state.terminal():
+            state.play(moves.pop())
+        return state.winner
+
+
+def opponent(mark):
+    return ttt.O if mark == ttt.X else ttt.X
@@ -0,0 +1,57 @@
+"""
+Compares the number of positions visited by max_value_alpha_beta /
+min_value_alpha_beta and by the Negamax search on every 3x3 position
+reachable in the first few moves.
+
+Usage: python nodes.py [moves]
+"""
+
+import math
+import sys
+
+import tictactoe as ttt
+
+
+def positions(board, moves):
+    """
+    Yields every non-terminal board reachable from board
+    in at most moves moves.
+    """
+    if ttt.terminal(board):
+        return
+    yield board
+    if moves > 0:
+        for action in sorted(ttt.actions(board)):
+            yield from positions(ttt.result(board, action), moves - 1)
+
+
+def main():
+    moves = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    alpha_beta = negamax = count = 0
+    for board in positions(ttt.initial_state(), moves):
+        ttt.nodes = 0
+        if ttt.player(board) == ttt.X:
+            expected = ttt.max_value_alpha_beta(board, -math.inf, math.inf)[0]
+        else:
+            expected = ttt.min_value_alpha_beta(board, -math.inf, math.inf)[0]
+        alpha_beta += ttt.nodes
+
+        search = ttt.Negamax(3)
+        state = ttt.GameState(board)
+        action, scores = search.root(state, state.empty)
+        negamax += search.nodes
+
+        # Both searches must agree on the value of the position
+        value = scores[action] if state.turn == ttt.X else -scores[action]
+        if (value > 0) - (value < 0) != expected:
+            raise Exception(f"negamax disagrees with alpha-beta on {board}")
+        count += 1
+
+    print(f"positions: {count}")
+    print(f"max_value_alpha_beta nodes: {alpha_beta}")
+    print(f"negamax nodes: {negamax}")
+    print(f"reduction: {alpha_beta / negamax:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
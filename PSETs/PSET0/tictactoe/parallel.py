@@ -0,0 +1,131 @@
+"""
+Parallel alpha-beta search for tictactoe boards of any size.
+
+The root moves are split across a process pool in the style of Young
+Brothers Wait: the first (most promising) move is searched on its own to
+get a bound, then the remaining moves are searched in parallel with
+Negamax, each worker starting from the best score any worker has found
+so far.
+
+Usage: python parallel.py [height width k depth]
+"""
+
+import math
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import tictactoe as ttt
+
+# Best score found so far at the root, from the point of view of the player
+# to move there, shared between the worker processes
+shared_best = None
+
+
+def init_worker(best):
+    global shared_best
+    shared_best = best
+
+
+def search_move(board, action, k, depth):
+    """
+    Returns (score, exact) for the player to move on board playing action,
+    searched depth plies deep, from that player's point of view. A score no
+    better than the shared best the search started from is only an upper
+    bound on the move's score, and exact is False.
+    """
+    state = ttt.GameState(board, k)
+    state.play(action)
+    alpha = shared_best.value
+    v = -ttt.Negamax(k).search(state, depth - 1, -math.inf, -alpha, 1)
+    if v <= alpha:
+        return v, False
+    with shared_best.get_lock():
+        if v > shared_best.value:
+            shared_best.value = v
+    return v, True
+
+
+def parallel_search(board, k=None, depth=None, workers=None):
+    """
+    Returns the best action for the current player on the board, searching
+    depth plies deep (to the end of the game by default) across workers
+    processes.
+    """
+    if ttt.terminal(board, k):
+        return None
+    state = ttt.GameState(board, k)
+    k = state.k
+    moves = ttt.Negamax(k).order(state, 0)
+    depth = depth or len(moves)
+
+    # Search the eldest brother alone to establish a bound for the rest
+    best = multiprocessing.Value("d", -math.inf)
+    init_worker(best)
+    best_move = moves[0]
+    best_v = search_move(board, best_move, k, depth)[0]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(best,)) as executor:
+        futures = {
+            executor.submit(search_move, board, action, k, depth): action
+            for action in moves[1:]
+        }
+        for future in as_completed(futures):
+            v, exact = future.result()
+
+            # A bound is at most the shared best it started from, which an
+            # exact score has already reached, so it never wins
+            if exact and v > best_v:
+                best_v, best_move = v, futures[future]
+    return best_move
+
+
+def serial_search(board, k=None, depth=None):
+    """
+    Returns the best action for the current player on the board using the
+    same depth-limited search as parallel_search, in this process only.
+    """
+    if ttt.terminal(board, k):
+        return None
+    state = ttt.GameState(board, k)
+    return ttt.Negamax(state.k).root(state, depth or state.empty)[0]
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    value = f(*args)
+    return value, time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) == 5:
+        height, width, k, depth = map(int, sys.argv[1:])
+    else:
+        height, width, k, depth = 3, 3, 3, None
+    board = ttt.initial_state(height, width)
+
+    # The serial Negamax search on the same board measures the gain from
+    # the worker processes alone; on 3x3, max_value_alpha_beta is timed too
+    baselines = []
+    if (height, width, k) == (3, 3, 3) and depth is None:
+        move, seconds = timed(
+            lambda: ttt.max_value_alpha_beta(board, -math.inf, math.inf)[1]
+        )
+        baselines.append(("max_value_alpha_beta", seconds))
+        print(f"max_value_alpha_beta: {move} in {seconds:.3f}s")
+    name = "serial search" if depth is None else f"serial depth {depth} search"
+    move, seconds = timed(serial_search, board, k, depth)
+    baselines.append((name, seconds))
+    print(f"{name}: {move} in {seconds:.3f}s")
+
+    workers = multiprocessing.cpu_count()
+    move, parallel = timed(parallel_search, board, k, depth, workers)
+    print(f"parallel search ({workers} workers): {move} in {parallel:.3f}s")
+    for name, seconds in baselines:
+        print(f"speedup over {name}: {seconds / parallel:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,25 @@
 import pygame
 import sys
+import threading
 import time
+from functools import lru_cache
 
 import tictactoe as ttt
 
+# Board size and marks in a row to win, e.g. `python runner.py 7 7 5`
+if len(sys.argv) == 4:
+    HEIGHT, WIDTH, K = map(int, sys.argv[1:])
+else:
+    HEIGHT, WIDTH, K = 3, 3, 3
+
+# Seconds the AI may think per move on boards too large to solve
+TIME_LIMIT = 1.0
+
+# Seconds the AI waits before playing, so its move doesn't appear instantly
+MIN_THINK_TIME = 0.5
+
+FPS = 60
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -12,19 +28,61 @@ black = (0, 0, 0)
 white = (255, 255, 255)
 
 screen = pygame.display.set_mode(size)
+clock = pygame.time.Clock()
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Shrink tiles (and the marks drawn in them) to fit larger boards
+tile_size = min(80, (height - 140) // HEIGHT, (width - 40) // WIDTH)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
+
+
+@lru_cache(maxsize=None)
+def render(font, text, color):
+    """
+    Returns the rendered surface for text, rendering it only once.
+    """
+    return font.render(text, True, color)
+
+
+def think(board, cancel, result):
+    """
+    Computes the AI's move for board on a background thread and
+    appends it to result. Larger boards stop early once cancel is set.
+    """
+    if (HEIGHT, WIDTH, K) == (3, 3, 3):
+        move = ttt.minimax(board)
+    else:
+        move = ttt.iterative_deepening(board, K, TIME_LIMIT, cancel=cancel)
+    result.append(move)
+
+
+def stop_thinking():
+    """
+    Cancels the AI's search, if it is running, and forgets its move.
+    """
+    global ai_thread
+    if ai_thread is not None:
+        ai_cancel.set()
+        ai_thread = None
+
 
 user = None
-board = ttt.initial_state()
-ai_turn = False
+state = ttt.GameState(ttt.initial_state(HEIGHT, WIDTH), K)
+board = state.board
+
+# Background search for the AI's move, if one is running
+ai_thread = None
+ai_cancel = None
+ai_result = None
+ai_started = None
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            stop_thinking()
             sys.exit()
 
     screen.fill(black)
@@ -33,21 +91,21 @@ while True:
     if user is None:
 
         # Draw title
-        title = largeFont.render("Play Tic-Tac-Toe", True, white)
+        title = render(largeFont, "Play Tic-Tac-Toe", white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 50)
         screen.blit(title, titleRect)
 
         # Draw buttons
         playXButton = pygame.Rect((width / 8), (height / 2), width / 4, 50)
-        playX = mediumFont.render("Play as X", True, black)
+        playX = render(mediumFont, "Play as X", black)
         playXRect = playX.get_rect()
         playXRect.center = playXButton.center
         pygame.draw.rect(screen, white, playXButton)
         screen.blit(playX, playXRect)
 
         playOButton = pygame.Rect(5 * (width / 8), (height / 2), width / 4, 50)
-        playO = mediumFont.render("Play as O", True, black)
+        playO = render(mediumFont, "Play as O", black)
         playORect = playO.get_rect()
         playORect.center = playOButton.center
         pygame.draw.rect(screen, white, playOButton)
@@ -67,13 +125,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (WIDTH / 2 * tile_size),
+                       height / 2 - (HEIGHT / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(HEIGHT):
             row = []
-            for j in range(3):
+            for j in range(WIDTH):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -82,19 +139,19 @@ while True:
                 pygame.draw.rect(screen, white, rect, 3)
 
                 if board[i][j] != ttt.EMPTY:
-                    move = moveFont.render(board[i][j], True, white)
+                    move = render(moveFont, board[i][j], white)
                     moveRect = move.get_rect()
                     moveRect.center = rect.center
                     screen.blit(move, moveRect)
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = state.terminal()
+        player = state.turn
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = state.winner
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -103,33 +160,40 @@ while True:
             title = f"Play as {user}"
         else:
             title = f"Computer thinking..."
-        title = largeFont.render(title, True, white)
+        title = render(largeFont, title, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, searching in the background so that
+        # the board keeps drawing and events keep being handled
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_thread is None:
+                ai_cancel = threading.Event()
+                ai_result = []
+                ai_started = time.perf_counter()
+                ai_thread = threading.Thread(
+                    target=think,
+                    args=([row[:] for row in board], ai_cancel, ai_result),
+                    daemon=True
+                )
+                ai_thread.start()
+            elif ai_result and time.perf_counter() - ai_started >= MIN_THINK_TIME:
+                state.play(ai_result[0])
+                ai_thread = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(HEIGHT):
+                for j in range(WIDTH):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
+                        state.play((i, j))
 
         if game_over:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
+            again = render(mediumFont, "Play Again", black)
             againRect = again.get_rect()
             againRect.center = againButton.center
             pygame.draw.rect(screen, white, againButton)
@@ -140,7 +204,9 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    state = ttt.GameState(ttt.initial_state(HEIGHT, WIDTH), K)
+                    board = state.board
+                    stop_thinking()
 
     pygame.display.flip()
+    clock.tick(FPS)
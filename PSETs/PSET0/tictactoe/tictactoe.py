@@ -3,21 +3,70 @@ Tic Tac Toe Player
 """
 
 import math
+import os
+import time
 import numpy as np
 from copy import deepcopy
+from functools import lru_cache
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Directions along which k marks in a row win the game:
+# right, down, down-right, down-left
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
 
-def initial_state():
+# Score of a won position for the depth-limited search, larger than any
+# heuristic evaluation of a board that is still in play.
+WIN_SCORE = 10 ** 9
+
+# Perfect-play table for the 3x3 board written by book.py, indexed by
+# board_index(); each byte holds (value + 1) << 4 | (3 * i + j), or
+# NO_MOVE for positions that are unreachable or already over.
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+BOOK_SIZE = 3 ** 9
+NO_MOVE = 0xFF
+book = None
+
+# Positions visited by max_value, min_value and their alpha-beta versions,
+# for comparing them against other searches
+nodes = 0
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search once its wall-clock budget is used up."""
+
+
+def initial_state(height=3, width=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * width for _ in range(height)]
+
+
+def default_k(board):
+    """
+    Returns how many marks in a row win on a board when no k is given:
+    the full side of the board, which is the classic 3x3 rule.
+    """
+    return min(len(board), len(board[0]))
+
+
+@lru_cache(maxsize=None)
+def lines(height, width, k):
+    """
+    Returns every run of k cells on a height x width board,
+    as a tuple of (i, j) tuples.
+    """
+    runs = []
+    for i in range(height):
+        for j in range(width):
+            for di, dj in DIRECTIONS:
+                end_i, end_j = i + (k - 1) * di, j + (k - 1) * dj
+                if 0 <= end_i < height and 0 <= end_j < width:
+                    runs.append(tuple((i + s * di, j + s * dj) for s in range(k)))
+    return tuple(runs)
 
 
 def player(board):
@@ -58,43 +107,32 @@ def result(board, action):
     new_board[i][j] = mark
     return new_board
 
-def transpose(board):
-    new_board = deepcopy(board)
-    new_board = zip(*new_board)
-    return new_board
-
-def check_diagonal_winner(board, mark):
-    off_diag = [board[i][i] for i in range(3)]
-    main_diag = [board[i][2-i] for i in range(3)]
-    return all(itm == mark for itm in off_diag) or all(itm == mark for itm in main_diag)
-
-def winner_check(board, mark):
-    return any(all(itm == mark for itm in row) for row in board)
-
-def winner(board):
+def winner(board, k=None):
     """
     Returns the winner of the game, if there is one.
     """
-    transposed_board = transpose(board)
-    if winner_check(board, X) or winner_check(transposed_board, X) or check_diagonal_winner(board, X):
-        return X
-    if winner_check(board, O) or winner_check(transposed_board, O) or check_diagonal_winner(board, O):
-        return O
+    k = k or default_k(board)
+    for line in lines(len(board), len(board[0]), k):
+        i, j = line[0]
+        mark = board[i][j]
+        if mark is not EMPTY and all(board[i][j] == mark for i, j in line):
+            return mark
     return None
 
 
-def terminal(board):
+def terminal(board, k=None):
     """
     Returns True if game is over, False otherwise.
     """
-    return winner(board) or all(all(itm != EMPTY for itm in row) for row in board)
+    return (winner(board, k) is not None
+            or all(all(itm != EMPTY for itm in row) for row in board))
 
 
-def utility(board):
+def utility(board, k=None):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    p = winner(board)
+    p = winner(board, k)
     if p == X:
         return 1
     elif p == O:
@@ -103,6 +141,8 @@ def utility(board):
         return 0
 
 def max_value(board):
+    global nodes
+    nodes += 1
     if terminal(board):
         return utility(board), None
     v = float("-inf")
@@ -115,6 +155,8 @@ def max_value(board):
     return v, best
 
 def min_value(board):
+    global nodes
+    nodes += 1
     if terminal(board):
         return utility(board), None
     v = float("inf")
@@ -140,6 +182,8 @@ def minimax_without_alpha_beta_pruning(board):
         raise Exception("bug in minimax algorithm")
 
 def max_value_alpha_beta(board, alpha, beta):
+    global nodes
+    nodes += 1
     if terminal(board):
         return utility(board), None
     v = float("-inf")
@@ -155,6 +199,8 @@ def max_value_alpha_beta(board, alpha, beta):
     return v, best
 
 def min_value_alpha_beta(board, alpha, beta):
+    global nodes
+    nodes += 1
     if terminal(board):
         return utility(board), None
     v = float("inf")
@@ -169,18 +215,319 @@ def min_value_alpha_beta(board, alpha, beta):
             break
     return v, best
 
+
+def board_index(board):
+    """
+    Returns the base-3 number of a board, reading cells row by row
+    with EMPTY as 0, X as 1 and O as 2.
+    """
+    index = 0
+    for row in board:
+        for itm in row:
+            index = index * 3 + (0 if itm is EMPTY else 1 if itm == X else 2)
+    return index
+
+
+def load_book(path=BOOK_PATH):
+    """
+    Loads the opening book from path, if it exists, and returns it.
+    """
+    global book
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if len(data) != BOOK_SIZE:
+        raise Exception(f"corrupt opening book {path}")
+    book = data
+    return book
+
+
+load_book()
+
+
+def book_lookup(board):
+    """
+    Returns (value, action) for a 3x3 board from the opening book,
+    or None if there is no book or no entry for the board.
+    """
+    if book is None or len(board) != 3 or len(board[0]) != 3:
+        return None
+    entry = book[board_index(board)]
+    if entry == NO_MOVE:
+        return None
+    return (entry >> 4) - 1, divmod(entry & 0xF, 3)
+
+
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
     if terminal(board):
         return None
-    if player(board) == X:
-        return max_value_alpha_beta(board, float("-inf"), float("inf"))[1]
-    elif player(board) == O:
-        return min_value_alpha_beta(board, float("-inf"), float("inf"))[1]
-    else:
-        raise Exception("bug in minimax algorithm")
+    entry = book_lookup(board)
+    if entry is not None:
+        return entry[1]
+    state = GameState(board)
+    return Negamax(state.k).root(state, state.empty)[0]
+
 
+def line_score(xs, os):
+    """
+    Returns how much a line holding xs X marks and os O marks
+    counts towards X, for the heuristic evaluation.
+    """
+    if xs and not os:
+        return 10 ** xs
+    if os and not xs:
+        return -10 ** os
+    return 0
 
-    
+
+@lru_cache(maxsize=None)
+def cell_lines(height, width, k):
+    """
+    Returns a dict mapping each cell to the indices in lines()
+    of the lines that pass through it.
+    """
+    through = {(i, j): [] for i in range(height) for j in range(width)}
+    for n, line in enumerate(lines(height, width, k)):
+        for cell in line:
+            through[cell].append(n)
+    return through
+
+
+class GameState():
+    """
+    A board that keeps, for every line of k cells, how many marks each
+    player has on it. Each move only updates the lines through its cell,
+    so the winner, whether the game is over and the heuristic evaluation
+    are all known without scanning the board.
+    """
+
+    def __init__(self, board=None, k=None):
+        self.board = deepcopy(board) if board is not None else initial_state()
+        self.k = k or default_k(self.board)
+        height, width = len(self.board), len(self.board[0])
+        self.lines = lines(height, width, self.k)
+        self.cell_lines = cell_lines(height, width, self.k)
+        self.turn = player(self.board)
+
+        # Marks per line for each player, and the evaluation they add up to
+        self.counts = {X: [0] * len(self.lines), O: [0] * len(self.lines)}
+        for n, line in enumerate(self.lines):
+            for i, j in line:
+                if self.board[i][j] is not EMPTY:
+                    self.counts[self.board[i][j]][n] += 1
+        self.score = sum(line_score(xs, os)
+                         for xs, os in zip(self.counts[X], self.counts[O]))
+
+        self.winner = winner(self.board, self.k)
+        self.empty = sum(row.count(EMPTY) for row in self.board)
+
+        # (action, winner, score) before each move, for undo()
+        self.history = []
+
+    def actions(self):
+        return actions(self.board)
+
+    def terminal(self):
+        return self.winner is not None or self.empty == 0
+
+    def utility(self):
+        return 1 if self.winner == X else -1 if self.winner == O else 0
+
+    def play(self, action):
+        """
+        Makes move action for the player to move.
+        """
+        i, j = action
+        if self.board[i][j] != EMPTY:
+            raise Exception("invalid board move")
+        mark = self.turn
+        self.history.append((action, self.winner, self.score))
+        xs, os = self.counts[X], self.counts[O]
+        counts = self.counts[mark]
+        for n in self.cell_lines[action]:
+            self.score -= line_score(xs[n], os[n])
+            counts[n] += 1
+            self.score += line_score(xs[n], os[n])
+            if counts[n] == self.k:
+                self.winner = mark
+        self.board[i][j] = mark
+        self.empty -= 1
+        self.turn = O if mark == X else X
+
+    def undo(self):
+        """
+        Takes back the last move.
+        """
+        (i, j), self.winner, self.score = self.history.pop()
+        mark = self.board[i][j]
+        counts = self.counts[mark]
+        for n in self.cell_lines[(i, j)]:
+            counts[n] -= 1
+        self.board[i][j] = EMPTY
+        self.empty += 1
+        self.turn = mark
+
+    def value(self, depth):
+        """
+        Returns the score of the position from X's point of view at the
+        edge of a depth-limited search, or None if the search has to
+        continue. Wins found with more depth left (i.e. sooner) score
+        higher, and positions at depth 0 score their heuristic evaluation.
+        """
+        if self.winner == X:
+            return WIN_SCORE + depth
+        if self.winner == O:
+            return -WIN_SCORE - depth
+        if self.empty == 0:
+            return 0
+        if depth == 0:
+            return self.score
+        return None
+
+
+@lru_cache(maxsize=None)
+def cell_weights(height, width, k):
+    """
+    Returns a dict mapping each cell to the number of winning lines
+    through it, so that the centre and then the corners of a 3x3
+    board weigh the most.
+    """
+    weights = {(i, j): 0 for i in range(height) for j in range(width)}
+    for line in lines(height, width, k):
+        for cell in line:
+            weights[cell] += 1
+    return weights
+
+
+class Negamax():
+    """
+    Negamax alpha-beta search with principal variation search. Moves are
+    tried in order of killer moves that caused a cutoff at the same ply,
+    the history heuristic and finally the number of lines through the cell.
+    """
+
+    def __init__(self, k, deadline=math.inf, cancel=None):
+        self.k = k
+        self.deadline = deadline
+
+        # threading.Event that stops the search early once set
+        self.cancel = cancel
+
+        # Two most recent cutoff moves per ply
+        self.killers = dict()
+
+        # Sum of depth * depth over cutoffs caused by each move
+        self.history = dict()
+
+        self.nodes = 0
+
+    def order(self, state, ply):
+        """
+        Returns the available actions in state, most promising first.
+        """
+        weights = cell_weights(len(state.board), len(state.board[0]), self.k)
+        killers = self.killers.get(ply, ())
+        return sorted(state.actions(), key=lambda a: (
+            a not in killers, -self.history.get(a, 0), -weights[a], a
+        ))
+
+    def cutoff(self, action, ply, depth):
+        """
+        Records that action caused a beta cutoff at ply.
+        """
+        killers = self.killers.setdefault(ply, [])
+        if action not in killers:
+            killers.insert(0, action)
+            del killers[2:]
+        self.history[action] = self.history.get(action, 0) + depth * depth
+
+    def search(self, state, depth, alpha, beta, ply=0):
+        """
+        Returns the score of state for the player to move, searching
+        depth plies deep. Moves are played and undone on state.
+        """
+        self.nodes += 1
+        if time.perf_counter() > self.deadline or (
+            self.cancel is not None and self.cancel.is_set()
+        ):
+            raise SearchTimeout()
+        v = state.value(depth)
+        if v is not None:
+            return v if state.turn == X else -v
+
+        best = -math.inf
+        for n, action in enumerate(self.order(state, ply)):
+            state.play(action)
+            if n == 0:
+                v = -self.search(state, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                # Prove the move is no better than alpha with a null window,
+                # re-searching with the full window only if that fails
+                v = -self.search(state, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < v < beta:
+                    v = -self.search(state, depth - 1, -beta, -v, ply + 1)
+            state.undo()
+            best = max(best, v)
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                self.cutoff(action, ply, depth)
+                break
+        return best
+
+    def root(self, state, depth, moves=None):
+        """
+        Returns (action, scores) for the player to move in state, where
+        scores maps each root action in moves to its score (exact for the
+        best action, an upper bound for the rest).
+        """
+        moves = moves or self.order(state, 0)
+        alpha, beta = -math.inf, math.inf
+        best = moves[0]
+        scores = dict()
+        for n, action in enumerate(moves):
+            state.play(action)
+            if n == 0:
+                v = -self.search(state, depth - 1, -beta, -alpha, 1)
+            else:
+                v = -self.search(state, depth - 1, -alpha - 1, -alpha, 1)
+                if v > alpha:
+                    v = -self.search(state, depth - 1, -beta, -v, 1)
+            state.undo()
+            scores[action] = v
+            if v > alpha:
+                alpha, best = v, action
+        return best, scores
+
+
+def iterative_deepening(board, k=None, time_limit=1.0, max_depth=None,
+                        cancel=None):
+    """
+    Returns the best action for the current player on an m x n board with
+    k in a row, found within time_limit seconds (or before the cancel event
+    is set). Each iteration searches one ply deeper and tries the root moves
+    in the order the previous iteration ranked them; the result of the last
+    completed iteration is returned.
+    """
+    if terminal(board, k):
+        return None
+    k = k or default_k(board)
+    search = Negamax(k, time.perf_counter() + time_limit, cancel)
+    state = GameState(board, k)
+    moves = search.order(state, 0)
+    best = moves[0]
+    for depth in range(1, (max_depth or len(moves)) + 1):
+        try:
+            best, scores = search.root(state, depth, moves)
+        except SearchTimeout:
+            break
+        moves.sort(key=lambda a: (a != best, -scores[a]))
+
+        # Stop early once the game is decided either way
+        if abs(scores[best]) >= WIN_SCORE:
+            break
+    return best
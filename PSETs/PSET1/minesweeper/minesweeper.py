@@ -1,6 +1,45 @@
+import functools
 import itertools
+import math
 import random
 
+# Flags in MinesweeperAI.status for each cell
+MADE = 1
+MINE = 2
+SAFE = 4
+
+
+@functools.lru_cache(maxsize=None)
+def neighbor_offsets(height, width):
+    """
+    Returns a table of the offsets from a cell's id to the ids of its
+    neighbors, indexed by [row edges][column edges], where edges is 1 for
+    the first row or column, 2 for the last, 3 for both and 0 otherwise.
+    """
+    table = []
+    for rows in range(4):
+        table.append([])
+        for cols in range(4):
+            table[rows].append(tuple(
+                di * width + dj
+                for di in (-1, 0, 1) for dj in (-1, 0, 1)
+                if (di, dj) != (0, 0)
+                and not (di == -1 and rows & 1) and not (di == 1 and rows & 2)
+                and not (dj == -1 and cols & 1) and not (dj == 1 and cols & 2)
+            ))
+    return table
+
+
+def neighbors(n, height, width):
+    """
+    Returns the ids of the cells next to the cell with id n, where the
+    cell in row i and column j has id i * width + j.
+    """
+    i, j = divmod(n, width)
+    rows = (i == 0) | (i == height - 1) << 1
+    cols = (j == 0) | (j == width - 1) << 1
+    return [n + offset for offset in neighbor_offsets(height, width)[rows][cols]]
+
 
 class Minesweeper():
     """
@@ -17,22 +56,17 @@ class Minesweeper():
         # At first, player has found no mines
         self.mines_found = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        # Initialize an empty field with no mines, one byte per cell id,
+        # and the number of mines next to each cell
+        self.board = bytearray(height * width)
+        self.nearby = bytearray(height * width)
 
         # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                # print((i, j))
-                self.mines.add((i, j))
-                self.board[i][j] = True        
+        for n in random.sample(range(height * width), mines):
+            self.mines.add(divmod(n, width))
+            self.board[n] = True
+            for neighbor in neighbors(n, height, width):
+                self.nearby[neighbor] += 1
 
     def print(self):
         """
@@ -42,7 +76,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.board[i * self.width + j]:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -51,7 +85,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i * self.width + j])
 
     def nearby_mines(self, cell):
         """
@@ -59,24 +93,8 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
-
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        i, j = cell
+        return self.nearby[i * self.width + j]
 
     def won(self):
         """
@@ -90,53 +108,53 @@ class Sentence():
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    Sentences are immutable: marking a cell returns a new sentence,
+    so a sentence's hash never changes while it is in a set.
     """
 
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells = frozenset(cells)
         self.count = count
-        self.mines = set()
-        self.safes = set()
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
     def __hash__(self):
-        return hash((tuple(self.cells), self.count))
+        return hash((self.cells, self.count))
 
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{set(self.cells)} = {self.count}"
 
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
         """
-        return self.mines
+        return self.cells if self.count == len(self.cells) else frozenset()
 
     def known_safes(self):
         """
         Returns the set of all cells in self.cells known to be safe.
         """
-        return self.safes
+        return self.cells if self.count == 0 else frozenset()
 
     def mark_mine(self, cell):
         """
-        Updates internal knowledge representation given the fact that
+        Returns the sentence that remains given the fact that
         a cell is known to be a mine.
         """
-        if cell in self.cells:
-            self.mines.add(cell)
-            self.cells.remove(cell)
-            self.count -= 1
+        if cell not in self.cells:
+            return self
+        return Sentence(self.cells - {cell}, self.count - 1)
 
     def mark_safe(self, cell):
         """
-        Updates internal knowledge representation given the fact that
+        Returns the sentence that remains given the fact that
         a cell is known to be safe.
         """
-        if cell in self.cells:
-            self.safes.add(cell)
-            self.cells.remove(cell)
+        if cell not in self.cells:
+            return self
+        return Sentence(self.cells - {cell}, self.count)
 
 
 class MinesweeperAI():
@@ -144,11 +162,12 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8):
 
-        # Set initial height and width
+        # Set initial height and width, and the number of mines on the board
         self.height = height
         self.width = width
+        self.total_mines = mines
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -157,28 +176,100 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
+        # The same as MADE, MINE and SAFE flags for each cell id, the number
+        # of cells flagged MADE, the number of cells not known to be safe or
+        # mines, and the ids of the safe cells that may not have been chosen
+        # yet. sync() catches up with cells added to the sets directly
+        self.status = bytearray(height * width)
+        self.made = 0
+        self.unknown = height * width
+        self.safe_moves = []
+
         # Set of sentences about the game known to be true
         self.knowledge = set()
 
+        # Sentences in knowledge that each cell appears in
+        self.index = dict()
+
+        # Sentences added to knowledge but not yet inferred from
+        self.pending = []
+
+        # Mine configurations of each group of sentences seen so far
+        self.solutions = dict()
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to knowledge, the index and the pending sentences,
+        unless it has no cells or is already known.
+        """
+        if not sentence.cells or sentence in self.knowledge:
+            return
+        self.knowledge.add(sentence)
+        for cell in sentence.cells:
+            self.index.setdefault(cell, set()).add(sentence)
+        self.pending.append(sentence)
+
+    def remove_sentence(self, sentence):
+        """
+        Removes a sentence from knowledge and the index.
+        """
+        self.knowledge.discard(sentence)
+        for cell in sentence.cells:
+            self.index[cell].discard(sentence)
+            if not self.index[cell]:
+                del self.index[cell]
+
     def mark_mine(self, cell):
         """
-        Marks a cell as a mine, and updates all knowledge
-        to mark that cell as a mine as well.
+        Marks a cell as a mine, and updates the sentences containing
+        that cell to mark it as a mine as well.
         """
         self.mines.add(cell)
-        self.moves_made.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        n = cell[0] * self.width + cell[1]
+        if not self.status[n] & MINE:
+            self.status[n] |= MINE
+            self.unknown -= 1
+        for sentence in list(self.index.get(cell, ())):
+            self.remove_sentence(sentence)
+            self.add_sentence(sentence.mark_mine(cell))
 
     def mark_safe(self, cell):
         """
-        Marks a cell as safe, and updates all knowledge
-        to mark that cell as safe as well.
+        Marks a cell as safe, and updates the sentences containing
+        that cell to mark it as safe as well.
         """
         self.safes.add(cell)
-        self.moves_made.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        n = cell[0] * self.width + cell[1]
+        if not self.status[n] & SAFE:
+            self.status[n] |= SAFE
+            self.unknown -= 1
+            self.safe_moves.append(n)
+        for sentence in list(self.index.get(cell, ())):
+            self.remove_sentence(sentence)
+            self.add_sentence(sentence.mark_safe(cell))
+
+    def sync(self):
+        """
+        Flags the cells added to self.moves_made, self.mines or self.safes
+        other than by add_knowledge, mark_mine or mark_safe, and updates the
+        sentences containing them.
+        """
+        # Each flag is set along with its set, so the sizes only differ
+        # after a direct change; then every cell of the sets is checked
+        if (len(self.moves_made) == self.made
+                and len(self.mines) + len(self.safes) == len(self.status) - self.unknown):
+            return
+        for cell in self.moves_made:
+            n = cell[0] * self.width + cell[1]
+            if not self.status[n] & MADE:
+                self.status[n] |= MADE
+                self.made += 1
+        for cell in list(self.mines):
+            if not self.status[cell[0] * self.width + cell[1]] & MINE:
+                self.mark_mine(cell)
+        for cell in list(self.safes):
+            if not self.status[cell[0] * self.width + cell[1]] & SAFE:
+                self.mark_safe(cell)
 
     def add_knowledge(self, cell, count):
         """
@@ -197,65 +288,60 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
 
-        self.safes.add(cell)
+        self.sync()
         self.moves_made.add(cell)
-        cells = []
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    tmp_cell = (i,j)
-                    if (tmp_cell != cell):
-                        cells.append(tmp_cell)
-        self.knowledge.add(Sentence(cells, count))
-        # add safe cell
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
-        # i need to think about the order of operations and keep iterating until knowledge stops changing
-        """ 
-        infer from one sentence count equalling the length of that 
-        sentences count that all of the cells are mines and then apply 
-        that knowledge to all sentences
-        """
-        for sentence in self.knowledge:
-            if (sentence.count == len(sentence.cells)):
-                for cell in sentence.cells:
-                    self.mines.add(cell)
-
-        for mine in self.mines:
-            for sentence in self.knowledge:
-                sentence.mark_mine(mine)
-        """
-        infer from one sentence count being zero but there being cells
-        that all those cells are safe and then propigate that knowledge
-        to current sentence and that particular cell knowledge to the
-        rest of the sentences
-        """
-        for sentence in self.knowledge:
-            if (sentence.count == 0 and len(sentence.cells) != 0):
-                for cell in sentence.cells:
-                    self.safes.add(cell)
-
-        for safe_cell in self.safes:
-            for sentence in self.knowledge:
-                sentence.mark_safe(safe_cell)
+        n = cell[0] * self.width + cell[1]
+        if not self.status[n] & MADE:
+            self.status[n] |= MADE
+            self.made += 1
+        self.mark_safe(cell)
 
+        # Only the neighbors not already known to be safe or mines
+        cells = []
+        for neighbor in neighbors(n, self.height, self.width):
+            if self.status[neighbor] & MINE:
+                count -= 1
+            elif not self.status[neighbor] & SAFE:
+                cells.append(divmod(neighbor, self.width))
+        self.add_sentence(Sentence(cells, count))
+        self.infer()
+
+    def infer(self):
         """
-        Add the difference between two complete subsets to knowledge
+        Draws conclusions from the pending sentences until there are none.
+
+        A sentence whose cells are all mines or all safe has its cells
+        marked. Otherwise, for each sentence sharing a cell with it where
+        one's cells are a subset of the other's, the difference of the two
+        is added as a new sentence. Only sentences that have been added or
+        changed are looked at again, and the loop stops when nothing new can
+        be inferred.
         """
-        new_sentences = []
-        for sentence1 in self.knowledge:
-            for sentence2 in self.knowledge:
-                if (sentence1 != sentence2 and sentence1.cells.issubset(sentence2.cells)):
-                    new_count = sentence2.count - sentence1.count
-                    new_set = sentence2.cells.difference(sentence1.cells)
-                    new_sentences.append(Sentence(new_set,new_count))
-        [self.knowledge.add(sentence) for sentence in new_sentences]
-
-        # for sentence in self.knowledge:
-        #     print(sentence.cells, sentence.count)
-        # print(f"safes: {self.safes}")
-        # print(f"moves_made: {self.moves_made}")
-
+        while self.pending:
+            sentence = self.pending.pop()
+            if sentence not in self.knowledge:
+                continue
+
+            mines = sentence.known_mines()
+            safes = sentence.known_safes()
+            if mines or safes:
+                for mine in mines:
+                    self.mark_mine(mine)
+                for safe_cell in safes:
+                    self.mark_safe(safe_cell)
+                continue
+
+            others = set()
+            for cell in sentence.cells:
+                others |= self.index[cell]
+            others.discard(sentence)
+            for other in others:
+                if sentence.cells < other.cells:
+                    self.add_sentence(Sentence(other.cells - sentence.cells,
+                                               other.count - sentence.count))
+                elif other.cells < sentence.cells:
+                    self.add_sentence(Sentence(sentence.cells - other.cells,
+                                               sentence.count - other.count))
 
     def make_safe_move(self):
         """
@@ -266,23 +352,314 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        diff = self.safes.difference(self.moves_made)
-        return None if not diff else random.choice(tuple(diff))
+        self.sync()
+
+        # Pick a random entry of safe_moves, dropping those already chosen
+        while self.safe_moves:
+            k = random.randrange(len(self.safe_moves))
+            self.safe_moves[k], self.safe_moves[-1] = self.safe_moves[-1], self.safe_moves[k]
+            n = self.safe_moves[-1]
+            if not self.status[n] & MADE:
+                return divmod(n, self.width)
+            self.safe_moves.pop()
+        return None
+
+    def components(self):
+        """
+        Splits knowledge into groups of sentences that share no cells
+        with the sentences of any other group. Each group is in the order
+        its sentences are reached from one another through shared cells.
+        """
+        groups = []
+        seen = set()
+        for sentence in self.knowledge:
+            if sentence in seen:
+                continue
+            seen.add(sentence)
+            group = [sentence]
+            for member in group:
+                for cell in member.cells:
+                    for other in self.index[cell]:
+                        if other not in seen:
+                            seen.add(other)
+                            group.append(other)
+            groups.append(group)
+        return groups
+
+    def configurations(self, sentences):
+        """
+        Returns a dict mapping each number of mines k to the number of
+        ways to place k mines in the cells of sentences that agree with all
+        of them, and to a dict of how many of those ways put a mine in each
+        cell. Results are remembered, as most groups do not change between
+        moves.
+        """
+        key = frozenset(sentences)
+        if key in self.solutions:
+            return self.solutions[key]
+
+        # Cells in the order they are reached from sentence to sentence, so
+        # that sentences are completed, and checked, as early as possible
+        cells = []
+        containing = dict()
+        for s, sentence in enumerate(sentences):
+            for cell in sorted(sentence.cells):
+                if cell not in containing:
+                    containing[cell] = []
+                    cells.append(cell)
+                containing[cell].append(s)
+        needed = [sentence.count for sentence in sentences]
+        unassigned = [len(sentence.cells) for sentence in sentences]
+
+        # Which cells from cells[i] on can be mines depends only on i and
+        # the mines each sentence still needs, so each such state is solved
+        # once however many ways there are to reach it
+        memo = dict()
+
+        def place(i):
+            """
+            Returns a dict mapping each number of mines k to the number of
+            ways to place k mines in cells[i:], given cells[:i], and to a
+            list of how many of those ways put a mine in each cell.
+            """
+            if i == len(cells):
+                return {0: (1, [0] * len(cells))}
+            state = (i, tuple(needed))
+            if state in memo:
+                return memo[state]
+
+            result = dict()
+            for mine in (0, 1):
+                possible = True
+                for s in containing[cells[i]]:
+                    needed[s] -= mine
+                    unassigned[s] -= 1
+                    if needed[s] < 0 or needed[s] > unassigned[s]:
+                        possible = False
+                if possible:
+                    for k, (ways, counts) in place(i + 1).items():
+                        if mine:
+                            counts = list(counts)
+                            counts[i] += ways
+                        if k + mine in result:
+                            other_ways, other_counts = result[k + mine]
+                            ways += other_ways
+                            counts = [a + b for a, b in zip(counts, other_counts)]
+                        result[k + mine] = (ways, counts)
+                for s in containing[cells[i]]:
+                    needed[s] += mine
+                    unassigned[s] += 1
+
+            memo[state] = result
+            return result
+
+        result = dict()
+        for k, (ways, counts) in place(0).items():
+            result[k] = (ways, {cell: count for cell, count in zip(cells, counts) if count})
+        self.solutions[key] = result
+        return result
+
+    def mine_probabilities(self):
+        """
+        Returns the probability that each cell in knowledge is a mine, and
+        the probability that any other cell not known to be safe or a mine
+        is (None if there are no such cells), counting every placement of
+        the remaining mines that agrees with knowledge as equally likely.
+
+        The groups of sentences that share no cells are solved separately.
+        Their solutions are combined by the number of mines each uses,
+        with the rest of the mines spread over the cells that no sentence
+        mentions in any of math.comb(cells, mines) ways. Those numbers have
+        thousands of digits on a large board, so all the ways are kept as
+        floats relative to the largest, with math.lgamma for the binomials.
+        """
+        left = self.total_mines - len(self.mines)
+        others = self.unknown - len(self.index)
+
+        # Each group's ways to use k mines, relative to its most likely k
+        groups = []
+        for group in self.components():
+            configurations = self.configurations(group)
+            scale = max(ways for ways, _ in configurations.values())
+            groups.append({k: (ways / scale, counts, scale)
+                           for k, (ways, counts) in configurations.items()})
+
+        def combine(a, b):
+            """Ways for two sets of groups together to use k mines."""
+            total = dict()
+            for k_a, ways_a in a.items():
+                for k_b, ways_b in b.items():
+                    total[k_a + k_b] = total.get(k_a + k_b, 0) + ways_a * ways_b
+            scale = max(total.values())
+            return {k: ways / scale for k, ways in total.items() if ways / scale > 0}
+
+        # Ways for the groups before (after) each group to use k mines
+        before = [{0: 1.0}]
+        for group in groups:
+            before.append(combine(before[-1], {k: w for k, (w, _, _) in group.items()}))
+        after = [{0: 1.0}]
+        for group in reversed(groups):
+            after.append(combine(after[-1], {k: w for k, (w, _, _) in group.items()}))
+        after.reverse()
+
+        # Ways to place the mines left after k among the other cells
+        def log_ways_outside(k):
+            return (math.lgamma(others + 1) - math.lgamma(left - k + 1)
+                    - math.lgamma(others - left + k + 1))
+        possible = [k for k in before[-1] if 0 <= left - k <= others]
+        if not possible:
+            return dict.fromkeys(self.index, left / self.unknown), left / self.unknown
+        largest = max(log_ways_outside(k) for k in possible)
+        outside = {k: math.exp(log_ways_outside(k) - largest) for k in possible}
+
+        probabilities = dict.fromkeys(self.index, 0)
+        for i, group in enumerate(groups):
+            rest = combine(before[i], after[i + 1])
+            total = 0
+            weights = dict()
+            for k, (ways, _, _) in group.items():
+                weights[k] = sum(w * outside.get(k + j, 0) for j, w in rest.items())
+                total += ways * weights[k]
+            for k, (_, counts, scale) in group.items():
+                for cell, count in counts.items():
+                    probabilities[cell] += count / scale * weights[k] / total
+
+        if not others:
+            return probabilities, None
+        total = sum(ways * outside.get(k, 0) for k, ways in before[-1].items())
+        mines_outside = sum(ways * outside.get(k, 0) * (left - k)
+                            for k, ways in before[-1].items())
+        return probabilities, mines_outside / total / others
+
+    def random_other_cell(self):
+        """
+        Returns a random cell that is not known to be safe or a mine
+        and is in no sentence, or None if there is none.
+        """
+        # Cells are mostly unknown on a large board, so a few random tries
+        # usually find one; otherwise take the next such cell after a
+        # random place, which bytearray.find looks for quickly
+        size = self.height * self.width
+        for _ in range(32):
+            n = random.randrange(size)
+            cell = divmod(n, self.width)
+            if not self.status[n] and cell not in self.index:
+                return cell
+        start = random.randrange(size)
+        for begin, end in ((start, size), (0, start)):
+            n = self.status.find(0, begin, end)
+            while n != -1:
+                if divmod(n, self.width) not in self.index:
+                    return divmod(n, self.width)
+                n = self.status.find(0, n + 1, end)
+        return None
 
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Should choose among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        picking at random among the cells least likely to be a mine.
         """
-        available_moves = set()
-        dont_choose = self.moves_made.union(self.mines)
-        for i in range(self.height):
-            for j in range(self.width):
-                tmp = (i,j)
-                if (tmp not in dont_choose):
-                    available_moves.add(tmp)
-                    
-        
-        return None if available_moves == set() else random.choice(tuple(available_moves))
+        safe_move = self.make_safe_move()
+        if safe_move is not None or not self.unknown:
+            return safe_move
+
+        probabilities, other = self.mine_probabilities()
+        lowest = min(probabilities.values(), default=1)
+        if other is not None and other < lowest - 1e-9:
+            return self.random_other_cell()
+        candidates = sorted(cell for cell, p in probabilities.items() if p <= lowest + 1e-9)
+
+        # On a tie, each cell in no sentence is as good as each candidate
+        if other is not None and other <= lowest + 1e-9:
+            others = self.unknown - len(self.index)
+            if random.randrange(len(candidates) + others) >= len(candidates):
+                return self.random_other_cell()
+        return random.choice(candidates)
+
+
+class GaussianMinesweeperAI(MinesweeperAI):
+    """
+    Minesweeper game player that, when the subset rule finds nothing more,
+    also solves its knowledge as a system of linear equations
+    """
+
+    def infer(self):
+        """
+        Draws conclusions from the pending sentences, then from row reducing
+        all of knowledge, until neither finds anything new.
+        """
+        super().infer()
+        while True:
+            mines, safes = self.eliminate()
+            if not mines and not safes:
+                return
+            for mine in mines:
+                self.mark_mine(mine)
+            for safe_cell in safes:
+                self.mark_safe(safe_cell)
+            super().infer()
+
+    def eliminate(self):
+        """
+        Returns the sets of cells that knowledge proves to be mines and safe
+        when each sentence is read as an equation: the sum of the 0 or 1
+        mine values of its cells is its count.
+
+        Each row holds a bitset of the cells with coefficient +1, a bitset
+        of the cells with coefficient -1, and the count. The rows are Gauss-
+        Jordan reduced. An elimination step that would give a cell a
+        coefficient of 2 or -2 is skipped, which can lose deductions but
+        never gives a wrong one. A row whose count is the largest sum its
+        cells can have, or the smallest, fixes every one of its cells.
+        """
+        cells = list(self.index)
+        columns = {cell: n for n, cell in enumerate(cells)}
+        rows = []
+        for sentence in self.knowledge:
+            plus = 0
+            for cell in sentence.cells:
+                plus |= 1 << columns[cell]
+            rows.append((plus, 0, sentence.count))
+
+        pivots = 0
+        for column in range(len(cells)):
+            bit = 1 << column
+            pivot = next((r for r in range(pivots, len(rows))
+                          if (rows[r][0] | rows[r][1]) & bit), None)
+            if pivot is None:
+                continue
+            rows[pivots], rows[pivot] = rows[pivot], rows[pivots]
+            plus, minus, count = rows[pivots]
+            if minus & bit:
+                plus, minus, count = minus, plus, -count
+                rows[pivots] = (plus, minus, count)
+
+            for r, (row_plus, row_minus, row_count) in enumerate(rows):
+                if r == pivots or not (row_plus | row_minus) & bit:
+                    continue
+
+                # Subtract the pivot row, or add it if the row has -1 here
+                if row_plus & bit:
+                    p_plus, p_minus, p_count = plus, minus, count
+                else:
+                    p_plus, p_minus, p_count = minus, plus, -count
+                if row_plus & p_minus or row_minus & p_plus:
+                    continue
+                rows[r] = ((row_plus & ~p_plus) | (p_minus & ~row_minus),
+                           (row_minus & ~p_minus) | (p_plus & ~row_plus),
+                           row_count - p_count)
+            pivots += 1
+
+        mines = safes = 0
+        for plus, minus, count in rows:
+            if count == plus.bit_count():
+                mines |= plus
+                safes |= minus
+            elif count == -minus.bit_count():
+                mines |= minus
+                safes |= plus
+        return ({cells[n] for n in range(len(cells)) if mines >> n & 1},
+                {cells[n] for n in range(len(cells)) if safes >> n & 1})